@@ -1,12 +1,29 @@
 import re
-import requests
+import asyncio
+import secrets
+from itertools import groupby
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_engine import HttpEngine, host_key
+from circuit_breaker import CircuitOpenError, SkipLog
+from reflection_context import PROBE_CHARS, classify_context
+from validated_lines import format_validated_line
+from url_clustering import ClusterIndex
 
 KXSS_OUTPUT_FILE = "kxss_output.txt"
-REFLECTION_MARKER = "text123"
 OUTPUT_FILE = "validated_urls.txt"
-MAX_THREADS = 10  # Set the number of threads you want to use
+MAX_CONCURRENCY = 100  # Probes in flight across all hosts
+MAX_PER_HOST = 10      # Ceiling for the adaptive (AIMD) per-host limit on pooled keep-alive connections
+LIMITS_FILE = "host_limits.json"  # Current per-host limits, rewritten periodically for monitoring
+SKIPPED_FILE = "skipped_kxss.txt"  # Pairs skipped on hosts with an open circuit, in kxss format to re-queue
+MAX_BODY_BYTES = 2 * 1024 * 1024  # Never read more than this much of a response
+MULTI_PARAM_PROBING = True  # Probe all flagged params of a URL in one request, each with its own marker
+CHAR_PROBING = True  # Record which payload chars (< > " ' ` ( ) / =) come back unencoded
+CLUSTERING = True  # Probe only a sample of URLs sharing scheme, host, path and param names
+CLUSTER_SAMPLE = 1  # Representatives probed per cluster; the rest inherit their result
+MAX_IN_FLIGHT = 200  # kxss URLs being validated at once; input is read only as slots free up
+
+skip_log = SkipLog(SKIPPED_FILE)
 
 def extract_param_url(line):
     match = re.search(r"param (\w+) is reflected.* on (http[s]?://\S+)", line)
@@ -19,12 +36,24 @@ def encode_marker_for_url(marker):
     """Encodes the marker to be URL-safe."""
     return quote(marker)
 
-def replace_param_value(url, param, new_value):
+def record_skipped(param, url):
+    """Written in kxss format so the file can be fed back in as KXSS_OUTPUT_FILE."""
+    print(f"[⛔] Host circuit open, skipped: {param} on {url}")
+    skip_log.record(f"param {param} is reflected on {url}")
+
+def new_marker():
+    """Returns a random alphanumeric marker that will not already be in the page."""
+    return "xs" + secrets.token_hex(4)
+
+def replace_param_values(url, new_values):
+    """Replaces several params at once; new_values maps param -> marker."""
     parsed = urlparse(url)
     query_params = parse_qs(parsed.query)
-    
-    # Handle empty params or replace with new_value (encoded)
-    if param in query_params:
+
+    if any(param not in query_params for param in new_values):
+        return None
+
+    for param, new_value in new_values.items():
         param_value = query_params[param][0]
         if not param_value:  # Empty param value, so we treat it like a URL insert
             encoded_value = encode_marker_for_url(f"https://example.com/{new_value}")
@@ -32,51 +61,303 @@ def replace_param_value(url, param, new_value):
         else:
             query_params[param] = [new_value]  # Just replace it directly with the marker
 
-        new_query = urlencode(query_params, doseq=True)
-        new_url = urlunparse(parsed._replace(query=new_query))
-        return new_url
-    return None
+    new_query = urlencode(query_params, doseq=True)
+    return urlunparse(parsed._replace(query=new_query))
+
+def replace_param_value(url, param, new_value):
+    return replace_param_values(url, {param: new_value})
+
+def is_reflected(scan_result, marker):
+    """Checks if the marker was seen while streaming the response body."""
+    return marker in scan_result.found
 
-def is_reflected(response_text, marker):
-    """Checks if the marker is reflected in the response body."""
-    return marker in response_text
+def reflection_context(scan_result, marker):
+    """Classifies where the marker landed from the bytes that preceded it."""
+    before = scan_result.before.get(marker, b"")
+    return classify_context(before.decode("utf-8", errors="replace"))
 
-def validate_url(param, url):
-    """Checks if the URL has the reflection of the marker."""
-    test_url = replace_param_value(url, param, REFLECTION_MARKER)
+def behaviour_changed(response, test_url):
+    """True when the probe was rejected or bounced somewhere else instead of rendering."""
+    if response.status_code >= 400:
+        return True
+    sent = urlparse(test_url)
+    landed = urlparse(response.url)
+    return (sent.netloc, sent.path) != (landed.netloc, landed.path)
+
+async def validate_url(engine, param, url):
+    """Checks if the URL has the reflection of a unique marker for one param."""
+    marker = new_marker()
+    test_url = replace_param_value(url, param, marker)
     if not test_url:
-        return None
+        return []
 
     try:
-        # Make the request with 30 seconds timeout
-        r = requests.get(test_url, timeout=30)
-        if is_reflected(r.text, REFLECTION_MARKER):
-            print(f"[✅] Reflected: {param} on {test_url}")
-            return f"{test_url} | {param}"
+        # Pooled, streamed request: stops reading once the marker shows up
+        r = await engine.scan(test_url, [marker])
+        if is_reflected(r, marker):
+            context = reflection_context(r, marker)
+            print(f"[✅] Reflected: {param} ({context}) on {test_url}")
+            return [(param, test_url, context)]
         else:
             print(f"[❌] Not reflected: {param} on {test_url}")
+    except CircuitOpenError:
+        record_skipped(param, url)
     except Exception as e:
         print(f"[⚠️] Request failed: {test_url} | {e}")
-    return None
+    return []
 
-def main():
-    with open(KXSS_OUTPUT_FILE, "r") as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    # Prepare the list of parameters and URLs
-    param_url_pairs = [(extract_param_url(line)) for line in lines]
-    param_url_pairs = [pair for pair in param_url_pairs if pair[0] and pair[1]]
-
-    with open(OUTPUT_FILE, "w") as out:
-        # Use ThreadPoolExecutor to handle concurrent requests
-        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            future_to_url = {executor.submit(validate_url, param, url): (param, url) for param, url in param_url_pairs}
-            
-            for future in as_completed(future_to_url):
-                result = future.result()
-                if result:
+async def validate_params(engine, url, params):
+    """
+    Probes every candidate param of the URL in one request, each carrying its
+    own marker, and maps the markers found in the body back to their params.
+    Falls back to one request per param if the combined request fails or
+    changes the page behaviour. Returns (param, param_url, context) tuples.
+    """
+    params = list(dict.fromkeys(params))
+    if len(params) == 1 or not MULTI_PARAM_PROBING:
+        return await validate_params_single(engine, url, params)
+
+    markers = {param: new_marker() for param in params}
+    test_url = replace_param_values(url, markers)
+    if not test_url:
+        # Some flagged param is missing from the URL, probe them one by one
+        return await validate_params_single(engine, url, params)
+
+    try:
+        r = await engine.scan(test_url, markers.values())
+    except CircuitOpenError:
+        for param in params:
+            record_skipped(param, url)
+        return []
+    except Exception as e:
+        print(f"[⚠️] Combined request failed, probing params one by one: {test_url} | {e}")
+        return await validate_params_single(engine, url, params)
+
+    if behaviour_changed(r, test_url):
+        print(f"[↩️] Combined request changed behaviour ({r.status_code}), probing params one by one: {test_url}")
+        return await validate_params_single(engine, url, params)
+
+    reflections = []
+    for param, marker in markers.items():
+        param_url = replace_param_value(url, param, marker)
+        if is_reflected(r, marker):
+            context = reflection_context(r, marker)
+            print(f"[✅] Reflected: {param} ({context}) on {param_url}")
+            reflections.append((param, param_url, context))
+        else:
+            print(f"[❌] Not reflected: {param} on {param_url}")
+    return reflections
+
+async def validate_params_single(engine, url, params):
+    """Per-param fallback: one request and one marker per param."""
+    reflections = []
+    for param in params:
+        reflections += await validate_url(engine, param, url)
+    return reflections
+
+def char_probe_value(marker, chars):
+    """marker<marker>marker... : each char sits between two copies of the marker."""
+    return marker + "".join(char + marker for char in chars)
+
+async def probe_chars_once(engine, url, param_chars):
+    """
+    Sends one request where every param carries its marker wrapped around the
+    chars to test. Returns param -> surviving chars, or None for params whose
+    probe was rejected or not reflected at all.
+    """
+    markers = {param: new_marker() for param in param_chars}
+    test_url = replace_param_values(url, {param: char_probe_value(markers[param], chars)
+                                          for param, chars in param_chars.items()})
+    needles = list(markers.values())
+    for param, chars in param_chars.items():
+        needles += [f"{markers[param]}{char}{markers[param]}" for char in chars]
+
+    try:
+        r = await engine.scan(test_url, needles)
+    except CircuitOpenError:
+        raise
+    except Exception:
+        return {param: None for param in param_chars}
+    if behaviour_changed(r, test_url):
+        return {param: None for param in param_chars}
+
+    survived = {}
+    for param, chars in param_chars.items():
+        marker = markers[param]
+        if marker not in r.found:
+            survived[param] = None
+        else:
+            survived[param] = "".join(char for char in chars if f"{marker}{char}{marker}" in r.found)
+    return survived
+
+async def probe_special_chars(engine, url, params):
+    """
+    Finds which payload characters come back unencoded for each reflected
+    param, using as few requests as possible: all params and chars in one
+    request, then one request per param, and only if a param's probe is
+    still rejected, one request per char. If the host's circuit opens
+    midway, the remaining params are left unknown rather than "nothing survives".
+    """
+    survived = {}
+    pending = list(params)
+
+    try:
+        if len(pending) > 1 and MULTI_PARAM_PROBING:
+            combined = await probe_chars_once(engine, url, {param: PROBE_CHARS for param in pending})
+            survived.update({param: chars for param, chars in combined.items() if chars is not None})
+            pending = [param for param in pending if param not in survived]
+
+        for param in pending:
+            chars = (await probe_chars_once(engine, url, {param: PROBE_CHARS}))[param]
+            if chars is None:
+                # The whole char set got the probe rejected, test each char on its own
+                chars = ""
+                for char in PROBE_CHARS:
+                    if (await probe_chars_once(engine, url, {param: char}))[param]:
+                        chars += char
+            survived[param] = chars
+    except CircuitOpenError:
+        print(f"[⛔] Host circuit open, special chars unknown on {url}")
+    return survived
+
+async def validate_group(engine, url, params):
+    """
+    Reflection check, then the special-char survival probe, for one kxss URL.
+    Returns (param, param_url, context, chars) tuples.
+    """
+    reflections = await validate_params(engine, url, params)
+    if not reflections:
+        return []
+
+    survived = {}
+    if CHAR_PROBING:
+        survived = await probe_special_chars(engine, url, [param for param, _, _ in reflections])
+
+    results = []
+    for param, param_url, context in reflections:
+        chars = survived.get(param)
+        if chars is not None:
+            print(f"[🔣] Unfiltered chars for {param}: {chars or 'none'}")
+        results.append((param, param_url, context, chars))
+    return results
+
+async def validate_clustered(engine, index, url, params, sample):
+    """
+    The first `sample` URLs of a template are probed; later URLs wait for
+    them and inherit every param they found reflected. A member flagging a
+    param no representative probed still gets that param probed itself.
+    """
+    cluster = index.get(url)
+    lines = []
+
+    if cluster.started < sample:
+        cluster.started += 1
+        cluster.params.update(params)
+        index.probed_urls += 1
+        try:
+            for param, param_url, context, chars in await validate_group(engine, url, params):
+                cluster.found.setdefault(param, (context, chars))
+                lines.append(format_validated_line(param_url, param, context=context, chars=chars))
+            if not lines and engine.breaker.is_open(host_key(url)):
+                cluster.skipped = True  # No verdict to carry over, members get re-queued too
+        finally:
+            cluster.finished += 1
+            if cluster.finished == sample:
+                cluster.ready.set()
+        return lines
+
+    await cluster.ready.wait()
+    if cluster.skipped and not cluster.found:
+        for param in params:
+            record_skipped(param, url)
+        return lines
+
+    for param, (context, chars) in cluster.found.items():
+        param_url = replace_param_value(url, param, new_marker())
+        if param_url:
+            lines.append(format_validated_line(param_url, param, context=context, chars=chars))
+
+    uncovered = [param for param in params if param not in cluster.params]
+    if uncovered:
+        cluster.params.update(uncovered)
+        index.probed_urls += 1
+        for param, param_url, context, chars in await validate_group(engine, url, uncovered):
+            cluster.found.setdefault(param, (context, chars))
+            lines.append(format_validated_line(param_url, param, context=context, chars=chars))
+    return lines
+
+def read_param_url_pairs(path, extract=extract_param_url):
+    """Lazily yields (param, url) pairs from the kxss output, one line at a time."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            param, url = extract(line)
+            if param and url:
+                yield param, url
+
+def group_params_by_url(param_url_pairs):
+    """
+    Groups consecutive kxss (param, url) pairs so each URL is probed once for
+    all its params. kxss prints every param of a URL together, so grouping
+    neighbours is enough and keeps the input streaming.
+    """
+    for url, pairs in groupby(param_url_pairs, key=lambda pair: pair[1]):
+        yield url, [param for param, _ in pairs]
+
+async def run_validation(param_url_pairs, output_file=OUTPUT_FILE):
+    """
+    Streams (param, url) pairs through the validator with at most
+    MAX_IN_FLIGHT URLs being worked on, writing results as they complete.
+    Memory stays flat regardless of input size.
+    """
+    if CLUSTERING:
+        index, sample = ClusterIndex(), CLUSTER_SAMPLE
+    else:
+        index, sample = ClusterIndex(key_func=lambda url: url), 1  # Every URL on its own
+
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    pending = set()
+    open(SKIPPED_FILE, "w").close()  # Fresh skip list for this run
+
+    async with HttpEngine(max_concurrency=MAX_CONCURRENCY, max_per_host=MAX_PER_HOST,
+                          max_body=MAX_BODY_BYTES) as engine:
+        monitor = asyncio.create_task(engine.limiter.monitor(LIMITS_FILE))
+        with open(output_file, "w") as out:
+
+            def write_results(task):
+                pending.discard(task)
+                in_flight.release()
+                if task.cancelled():
+                    return
+                if task.exception():
+                    print(f"[⚠️] Validation task failed: {task.exception()}")
+                    return
+                for result in task.result():
                     out.write(result + "\n")
+                out.flush()
+
+            for url, params in group_params_by_url(param_url_pairs):
+                await in_flight.acquire()
+                task = asyncio.create_task(validate_clustered(engine, index, url, params, sample))
+                pending.add(task)
+                task.add_done_callback(write_results)
+
+            if pending:
+                await asyncio.wait(set(pending))
+
+        monitor.cancel()
+        engine.limiter.write_snapshot(LIMITS_FILE)
+
+    if CLUSTERING:
+        print(index.report())
+    if skip_log.count:
+        print(f"[⛔] {skip_log.count} pairs skipped on dead hosts, re-queue them from {SKIPPED_FILE}")
+
+def main():
+    # Pairs are read lazily, the whole kxss file is never held in memory
+    asyncio.run(run_validation(read_param_url_pairs(KXSS_OUTPUT_FILE)))
 
 if __name__ == "__main__":
     main()
-
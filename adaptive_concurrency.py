@@ -0,0 +1,186 @@
+import json
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+
+# === AIMD Config ===
+INITIAL_LIMIT = 2        # Concurrent requests/page loads a new host starts with
+MIN_LIMIT = 1
+MAX_LIMIT = 10
+BACKOFF_FACTOR = 0.5     # Multiplicative decrease on timeouts, 429s and 5xx
+LATENCY_TOLERANCE = 2.0  # Latency counts as healthy while within 2x the best seen for the host
+EWMA_ALPHA = 0.2
+SNAPSHOT_INTERVAL = 10   # Seconds between limit snapshots written for monitoring
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class HostLimit:
+    """AIMD state for one host: grows by ~1 per window of healthy results, halves on failure."""
+
+    def __init__(self, initial, minimum, maximum):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.latency = None       # EWMA, seconds
+        self.best_latency = None
+        self.successes = 0
+        self.failures = 0
+        self.last_backoff = 0.0
+
+    @property
+    def allowed(self):
+        return max(self.minimum, int(self.limit))
+
+    def fits(self, count):
+        # A single request to an idle host always goes; a batch never goes past the limit
+        return self.in_flight + count <= self.allowed or (count == 1 and self.in_flight == 0)
+
+    def record_success(self, latency):
+        self.successes += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+
+        # Slow but successful answers hold the limit, fast ones raise it
+        if self.latency <= self.best_latency * LATENCY_TOLERANCE:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def record_failure(self):
+        self.failures += 1
+        now = time.monotonic()
+        # A burst of failures from the same round trip only backs off once
+        if now - self.last_backoff >= (self.latency or 1.0):
+            self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+            self.last_backoff = now
+
+    def snapshot(self):
+        return {
+            "limit": self.allowed,
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000) if self.latency is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class AdaptiveController:
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT):
+        self.initial = min(initial, maximum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._hosts = {}
+
+    def _host(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = HostLimit(self.initial, self.minimum, self.maximum)
+        return self._hosts[host]
+
+    def _record(self, state, started, ok):
+        state.in_flight -= 1
+        if ok is None:
+            return  # Slot handed back unused (e.g. circuit open), says nothing about the host
+        if ok:
+            state.record_success(time.monotonic() - started)
+        else:
+            state.record_failure()
+
+    def snapshot(self):
+        """Current per-host limits, for monitoring."""
+        return {host: state.snapshot() for host, state in list(self._hosts.items())}
+
+    def write_snapshot(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+class AsyncAdaptiveLimiter(AdaptiveController):
+    """Per-host AIMD limiter for the asyncio HTTP stages."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._conditions = {}
+
+    def _condition(self, host):
+        if host not in self._conditions:
+            self._conditions[host] = asyncio.Condition()
+        return self._conditions[host]
+
+    async def acquire(self, host):
+        """Waits for a slot on the host; returns the start time to hand back to release()."""
+        state = self._host(host)
+        condition = self._condition(host)
+        async with condition:
+            await condition.wait_for(lambda: state.fits(1))
+            state.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, host, started, ok):
+        """ok=False for timeouts, connection errors, 429s and 5xx; None if nothing was sent."""
+        condition = self._condition(host)
+        async with condition:
+            self._record(self._host(host), started, ok)
+            condition.notify_all()
+
+    async def monitor(self, path, interval=SNAPSHOT_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            self.write_snapshot(path)
+
+
+class ThreadedAdaptiveLimiter(AdaptiveController):
+    """Per-host AIMD limiter shared by the browser worker threads."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+
+    def acquire_prefix(self, hosts):
+        """
+        Waits until the first host has a free slot, then takes one slot per
+        URL for the longest run of hosts whose limits all allow it, in one
+        step: a worker opening several tabs never waits while holding slots.
+        Returns (how many of hosts got a slot, start time); the caller loads
+        those and comes back for the rest.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._host(hosts[0]).fits(1))
+            taken = 0
+            for host in hosts:
+                state = self._host(host)
+                if not state.fits(1):
+                    break
+                state.in_flight += 1
+                taken += 1
+        return taken, time.monotonic()
+
+    def acquire(self, host):
+        _, started = self.acquire_prefix([host])
+        return started
+
+    def release(self, host, started, ok):
+        with self._condition:
+            self._record(self._host(host), started, ok)
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return super().snapshot()
+
+    def start_monitor(self, path, interval=SNAPSHOT_INTERVAL):
+        """Writes the current limits to path every interval seconds from a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot(path)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
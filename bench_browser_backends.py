@@ -0,0 +1,138 @@
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from browser_backend import BACKEND_CDP, BACKEND_SELENIUM, BROWSER_ERRORS, launch_browser
+
+# === Benchmark: per-URL browser overhead, DevTools direct vs chromedriver ===
+# Usage: python3 bench_browser_backends.py [number of URLs] [chromedriver path]
+# Serves tiny pages from a local server (every third one fires alert(1)) so
+# the time per URL is command overhead rather than network, then runs the
+# same URLs through each backend:
+#   round trip  one no-op command (Runtime.evaluate / execute_script)
+#   tab cycle   new_tab + navigate + outcome + close_tab, as the tab runners do
+#   same tab    navigate + outcome in one reused tab
+#   driver.get  (selenium only) switch_to.window + get + switch_to.alert, the old hot loop
+# Detections are counted too: every backend must find the same alerts.
+URL_COUNT = 60
+ROUND_TRIPS = 200
+CHROME_ARGS = ["--headless=new", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu"]
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        script = "<script>alert(1)</script>" if "fire" in self.path else ""
+        body = f"<html><body><p>{self.path}</p>{script}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def page_urls(server, count):
+    base = f"http://127.0.0.1:{server.server_port}"
+    return [f"{base}/page{i}?q={'fire' if i % 3 == 0 else 'clean'}{i}" for i in range(count)]
+
+
+def timed(func, count):
+    started = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - started) * 1000 / count, result
+
+
+def round_trips(browser, handle):
+    if browser.name == BACKEND_CDP:
+        session = browser.watcher.session(handle)
+        command = lambda: session.send("Runtime.evaluate", {"expression": "1", "returnByValue": True})
+    else:
+        browser.driver.switch_to.window(handle)
+        command = lambda: browser.driver.execute_script("return 1")
+    for _ in range(ROUND_TRIPS):
+        command()
+
+
+def tab_cycles(browser, urls):
+    hits = 0
+    for url in urls:
+        handle = browser.new_tab()
+        browser.navigate(handle, url)
+        _, alert_text = browser.outcome(handle, 10)
+        hits += alert_text is not None
+        browser.close_tab(handle)
+    return hits
+
+
+def same_tab(browser, handle, urls):
+    hits = 0
+    for url in urls:
+        browser.navigate(handle, url)
+        _, alert_text = browser.outcome(handle, 10)
+        hits += alert_text is not None
+    return hits
+
+
+def driver_get(browser, handle, urls):
+    driver = browser.driver
+    if browser.watcher is not None:
+        browser.watcher.detach(handle)  # Leave the alert to chromedriver, as in the old loop
+    hits = 0
+    for url in urls:
+        driver.switch_to.window(handle)
+        driver.get(url)
+        try:
+            alert = driver.switch_to.alert
+            alert.accept()
+            hits += 1
+        except Exception:
+            pass
+    return hits
+
+
+def bench(backend, urls, driver_path):
+    try:
+        browser = launch_browser(backend, args=CHROME_ARGS, driver_path=driver_path, settle=0)
+    except BROWSER_ERRORS as e:
+        print(f"[⚠️] {backend}: could not start a browser ({e})")
+        return
+    if browser.name != backend:
+        print(f"[⚠️] {backend}: fell back to {browser.name}, skipped")
+        browser.quit()
+        return
+    try:
+        handle = browser.new_tab()
+        rtt, _ = timed(lambda: round_trips(browser, handle), ROUND_TRIPS)
+        cycle, cycle_hits = timed(lambda: tab_cycles(browser, urls), len(urls))
+        reused, reused_hits = timed(lambda: same_tab(browser, handle, urls), len(urls))
+        print(f"[⏱] {backend}: round trip {rtt:.2f} ms | tab cycle {cycle:.1f} ms/URL ({cycle_hits} alerts) | "
+              f"same tab {reused:.1f} ms/URL ({reused_hits} alerts)")
+        if backend == BACKEND_SELENIUM:
+            classic, classic_hits = timed(lambda: driver_get(browser, handle, urls), len(urls))
+            print(f"[⏱] {backend}: driver.get {classic:.1f} ms/URL ({classic_hits} alerts)")
+    finally:
+        browser.quit()
+
+
+def main():
+    url_count = int(sys.argv[1]) if len(sys.argv) > 1 else URL_COUNT
+    driver_path = sys.argv[2] if len(sys.argv) > 2 else None
+    server = start_server()
+    urls = page_urls(server, url_count)
+    print(f"[📦] {len(urls)} local URLs, {sum('fire' in url for url in urls)} of them fire an alert")
+    for backend in (BACKEND_CDP, BACKEND_SELENIUM):
+        bench(backend, urls, driver_path)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
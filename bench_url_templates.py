@@ -0,0 +1,93 @@
+import os
+import sys
+import copy
+import time
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+from url_templates import compile_template, encode_payloads
+
+# === Microbenchmark: per-payload URL rebuild vs precompiled templates ===
+# Usage: python3 bench_url_templates.py [payloads file] [number of validated URLs]
+# Builds every payload URL for a set of synthetic validated "url | param"
+# lines both ways, checks the outputs are identical and prints throughput.
+PAYLOADS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xss_classic", "payloads.txt")
+URL_COUNT = 200
+ROUNDS = 3
+
+
+def synthetic_lines(count):
+    for i in range(count):
+        url = (f"https://shop{i % 17}.example.com/catalog/item{i}?id={i}&q=search+term{i}"
+               f"&sort=price&page={i % 9}&ref=home&utm_source=news")
+        yield url, ("q" if i % 2 else "id")
+
+
+def classic_rebuild(lines, payloads):
+    out = []
+    for url, param in lines:
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        for payload in payloads:
+            new_query = query.copy()
+            new_query[param] = [payload]
+            encoded_query = urlencode(new_query, doseq=True)
+            out.append(urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, encoded_query, parsed.fragment)))
+    return out
+
+
+def poly_rebuild(lines, payloads):
+    out = []
+    for url, param in lines:
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        for payload in payloads:
+            new_query = copy.deepcopy(query)
+            new_query[param] = [payload]
+            query_str = "&".join(f"{k}={v[0]}" for k, v in new_query.items())
+            out.append(urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, query_str, parsed.fragment)))
+    return out
+
+
+def templated(lines, payloads, raw=False):
+    out = []
+    encoded = encode_payloads(payloads, raw=raw)
+    for url, param in lines:
+        template = compile_template(url, param, raw=raw)
+        for payload in payloads:
+            out.append(template.prefix + encoded[payload] + template.suffix)
+    return out
+
+
+def best_of(func, *args, **kwargs):
+    best = None
+    result = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def compare(name, baseline, lines, payloads, raw):
+    old_time, old_urls = best_of(baseline, lines, payloads)
+    new_time, new_urls = best_of(templated, lines, payloads, raw=raw)
+    assert old_urls == new_urls, f"{name}: templated URLs differ from the rebuilt ones"
+    total = len(old_urls)
+    print(f"[⏱] {name}: {total} URLs | rebuild {total / old_time:,.0f} URLs/s | "
+          f"template {total / new_time:,.0f} URLs/s | {old_time / new_time:.1f}x faster")
+
+
+def main():
+    payloads_file = sys.argv[1] if len(sys.argv) > 1 else PAYLOADS_FILE
+    url_count = int(sys.argv[2]) if len(sys.argv) > 2 else URL_COUNT
+    with open(payloads_file) as f:
+        payloads = [line.strip() for line in f if line.strip()]
+    lines = list(synthetic_lines(url_count))
+
+    compare("classic (urlencode)", classic_rebuild, lines, payloads, raw=False)
+    compare("polyglot (raw, deepcopy)", poly_rebuild, lines, payloads, raw=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import os
+import time
+import base64
+import shutil
+import tempfile
+import subprocess
+
+import websocket  # websocket-client, installed with selenium
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from cdp_client import CdpSession, DialogWatcher, DocumentInterceptor, DIALOG_SETTLE_SECONDS
+
+# === Browser Backends ===
+# What the tab runners need from a browser, behind one interface:
+#   new_tab() -> handle            navigate(handle, url) -> error text or None
+#   outcome(handle, timeout) -> (loaded, alert text or None)
+#   calls(handle)   screenshot(handle, path)   close_tab(handle)   quit()
+# CdpBackend launches Chrome itself and drives it over its DevTools
+# websockets: no command takes the HTTP hop to chromedriver and back.
+# SeleniumBackend keeps chromedriver as the fallback, with DevTools dialog
+# events when they work and the old fixed waits when they do not.
+# With a ResponseStore, new_tab() also starts a DocumentInterceptor on the
+# tab, so its navigation is served from the pre-screen's captured document.
+# Only the chunked runners (chunked_runner.py) go through launch_browser.
+# xss_classic/fixed_xss.py, newxssspro.py and xss_parrell_tab_final1.py stay
+# on chromedriver on purpose (see selenium_runner.py): their one-tab
+# fallbacks load with driver.get, newxssspro sets cookies with add_cookie,
+# and their concurrent tabs run TabEngine over a DialogWatcher on the driver.
+BACKEND_CDP = "cdp"
+BACKEND_SELENIUM = "selenium"
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+CHROME_START_TIMEOUT = 20
+FIXED_ALERT_WAIT = 3  # Selenium without DevTools: how long a loaded tab gets before the alert check
+
+# Everything a backend call can raise when a tab or the browser misbehaves
+BROWSER_ERRORS = (WebDriverException, RuntimeError, TimeoutError, OSError, websocket.WebSocketException)
+
+
+def find_chrome():
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class CdpBackend:
+    """Chrome started with --remote-debugging-port; tabs are DevTools targets."""
+
+    name = BACKEND_CDP
+
+    def __init__(self, args=(), user_agent=None, binary=None, settle=DIALOG_SETTLE_SECONDS, hook=False, store=None):
+        binary = binary or find_chrome()
+        if binary is None:
+            raise RuntimeError(f"no Chrome binary found (tried {', '.join(CHROME_BINARIES)})")
+        self.profile = tempfile.mkdtemp(prefix="xss-chrome-")
+        command = [binary, "--remote-debugging-port=0", f"--user-data-dir={self.profile}",
+                   "--no-first-run", "--no-default-browser-check", *args]
+        if user_agent:
+            command.append(f"--user-agent={user_agent}")
+        command.append("about:blank")
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self.address, browser_path = self._devtools_endpoint()
+            self.browser = CdpSession(f"ws://{self.address}{browser_path}")
+        except Exception:
+            self._stop()
+            raise
+        self.watcher = DialogWatcher(None, settle=settle, hook=hook, address=self.address)
+        self.interceptor = DocumentInterceptor(None, store, address=self.address) if store is not None else None
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def served(self):
+        """Navigations fulfilled from the response store."""
+        return self.interceptor.served if self.interceptor is not None else 0
+
+    def _devtools_endpoint(self):
+        # Chrome writes the port it picked and the browser target path here once DevTools listens
+        path = os.path.join(self.profile, "DevToolsActivePort")
+        deadline = time.monotonic() + CHROME_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chrome exited with code {self.process.returncode}")
+            if os.path.exists(path):
+                with open(path) as f:
+                    lines = f.read().split()
+                if len(lines) == 2:
+                    return f"127.0.0.1:{lines[0]}", lines[1]
+            time.sleep(0.05)
+        raise TimeoutError("Chrome did not open its DevTools port")
+
+    def alive(self):
+        return self.process.poll() is None and not self.browser.closed
+
+    def new_tab(self):
+        handle = self.browser.send("Target.createTarget", {"url": "about:blank"})["targetId"]
+        self.watcher.arm(handle)
+        if self.interceptor is not None:
+            self.interceptor.attach(handle)
+        return handle
+
+    def navigate(self, handle, url):
+        self.watcher.arm(handle)
+        return self.watcher.navigate(url, handle)
+
+    def outcome(self, handle, timeout):
+        return self.watcher.wait(handle, timeout=timeout)
+
+    def calls(self, handle):
+        return self.watcher.calls(handle)
+
+    def screenshot(self, handle, path):
+        data = self.watcher.session(handle).send("Page.captureScreenshot")["data"]
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(data))
+
+    def close_tab(self, handle):
+        self.watcher.detach(handle)
+        if self.interceptor is not None:
+            self.interceptor.detach(handle)
+        self.browser.send("Target.closeTarget", {"targetId": handle})
+
+    def _stop(self):
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+    def quit(self):
+        self.watcher.close()
+        if self.interceptor is not None:
+            self.interceptor.close()
+        try:
+            self.browser.send("Browser.close", wait=False)  # Chrome may close the socket before answering
+        except BROWSER_ERRORS:
+            pass
+        self.browser.close()
+        self._stop()
+
+
+class SeleniumBackend:
+    """chromedriver; tab management goes through it, dialogs through DevTools when event_driven."""
+
+    name = BACKEND_SELENIUM
+
+    def __init__(self, driver, settle=DIALOG_SETTLE_SECONDS, hook=False, event_driven=True, store=None):
+        self.driver = driver
+        self.home = driver.current_window_handle  # Never handed out, keeps the window open
+        self.watcher = None
+        self.interceptor = None
+        if store is not None:
+            try:
+                self.interceptor = DocumentInterceptor(driver, store)
+            except Exception as e:
+                print(f"⚠️ DevTools interception failed, loading documents from the network: {e}")
+        if event_driven:
+            try:
+                self.watcher = DialogWatcher(driver, settle=settle, hook=hook)
+                self.watcher.arm(self.home)
+            except Exception as e:
+                print(f"⚠️ DevTools dialog events failed, falling back to fixed waits: {e}")
+                self.watcher = None
+
+    @property
+    def pid(self):
+        return self.driver.service.process.pid  # chromedriver; Chrome is its child
+
+    @property
+    def served(self):
+        return self.interceptor.served if self.interceptor is not None else 0
+
+    def _intercept(self, handle):
+        if self.interceptor is None:
+            return
+        try:
+            self.interceptor.attach(handle)
+        except Exception as e:
+            print(f"⚠️ DevTools interception failed on a tab, loading it from the network: {e}")
+
+    def alive(self):
+        try:
+            self.driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    def new_tab(self):
+        self.driver.switch_to.new_window("tab")
+        handle = self.driver.current_window_handle
+        self._intercept(handle)
+        return handle
+
+    def navigate(self, handle, url):
+        if self.watcher is not None:
+            self.watcher.arm(handle)
+            return self.watcher.navigate(url, handle)
+        self.driver.switch_to.window(handle)
+        self.driver.execute_script("window.location.href = arguments[0];", url)
+        return None
+
+    def outcome(self, handle, timeout):
+        if self.watcher is not None:
+            return self.watcher.wait(handle, timeout=timeout)
+
+        self.driver.switch_to.window(handle)
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            loaded = True
+        except:
+            loaded = False
+        time.sleep(FIXED_ALERT_WAIT)
+        try:
+            alert = self.driver.switch_to.alert
+            alert_text = alert.text
+            alert.accept()
+            return loaded, alert_text
+        except:
+            return loaded, None
+
+    def calls(self, handle):
+        return self.watcher.calls(handle) if self.watcher is not None else []
+
+    def screenshot(self, handle, path):
+        self.driver.switch_to.window(handle)
+        self.driver.save_screenshot(path)
+
+    def close_tab(self, handle):
+        if self.watcher is not None:
+            self.watcher.detach(handle)
+        if self.interceptor is not None:
+            self.interceptor.detach(handle)
+        self.driver.switch_to.window(handle)
+        self.driver.close()
+        self.driver.switch_to.window(self.home)
+
+    def quit(self):
+        if self.watcher is not None:
+            self.watcher.close()
+        if self.interceptor is not None:
+            self.interceptor.close()
+        self.driver.quit()
+
+
+def launch_browser(backend=BACKEND_CDP, args=(), user_agent=None, driver_path=None,
+                   settle=DIALOG_SETTLE_SECONDS, hook=False, event_driven=True, store=None):
+    """A browser on the requested backend; Selenium when Chrome cannot be driven directly."""
+    if backend == BACKEND_CDP:
+        try:
+            return CdpBackend(args, user_agent, settle=settle, hook=hook, store=store)
+        except BROWSER_ERRORS as e:
+            print(f"⚠️ Direct DevTools launch failed, falling back to Selenium: {e}")
+
+    options = Options()
+    for arg in args:
+        options.add_argument(arg)
+    if user_agent:
+        options.add_argument(f"user-agent={user_agent}")
+    service = Service(driver_path) if driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=options)
+    return SeleniumBackend(driver, settle=settle, hook=hook, event_driven=event_driven, store=store)
@@ -0,0 +1,186 @@
+import time
+import queue
+import threading
+
+import psutil
+
+# === Warm Browser Pool ===
+# Chrome used to be started when a worker began and again only after it
+# crashed, so long runs kept one renderer growing until the OOM killer
+# stepped in, and every restart stalled its worker for the whole launch.
+# The pool launches browsers (chromedriver and all) ahead of time on
+# background threads and keeps `spares` of them warm. A worker recycles its
+# browser after RECYCLE_AFTER_PAGES pages or once the browser's process tree
+# passes RECYCLE_RSS_MB: it takes a warm spare straight away and the old one
+# quits in the background. admit() holds new page loads while system memory
+# is nearly full, so the pressure eases before anything gets killed.
+WARM_SPARES = 1
+RECYCLE_AFTER_PAGES = 500
+RECYCLE_RSS_MB = 2048  # Summed RSS of the browser's process tree (shared pages counted per process)
+RSS_CHECK_EVERY = 20  # Pages between two RSS measurements
+MEMORY_HIGH_PERCENT = 85  # System memory use above which admit() holds new page loads
+MEMORY_HOLD_MAX_SECONDS = 60  # After this, admit() lets a load through anyway
+MEMORY_POLL_SECONDS = 1
+
+
+def tree_rss_mb(pid):
+    """Resident memory of a process and all its children (Chrome's renderers), in MB."""
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return 0
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 2 ** 20
+
+
+class BrowserPool:
+    """
+    Thread-safe pool of ready browsers. launch() builds one (any object),
+    pid(browser) is the root of its process tree, quit(browser) shuts it down.
+    """
+
+    def __init__(self, launch, pid=lambda browser: browser.pid, quit=lambda browser: browser.quit(),
+                 spares=WARM_SPARES, recycle_pages=RECYCLE_AFTER_PAGES, recycle_rss_mb=RECYCLE_RSS_MB,
+                 memory_high_percent=MEMORY_HIGH_PERCENT):
+        self.launch = launch
+        self.pid = pid
+        self.quit = quit
+        self.spares = spares
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        self.memory_high_percent = memory_high_percent
+        self.recycled = 0
+        self.held_seconds = 0.0
+        self._ready = queue.Queue()  # Launched browsers, or None for a failed launch
+        self._launching = 0
+        self._pages = {}  # id(browser) -> pages loaded since it left the pool
+        self._quitting = []  # Background quits, joined by close()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    # --- Launching ---
+    def warm(self, count):
+        """Starts launching count browsers in the background (the workers' first ones plus the spares)."""
+        for _ in range(count):
+            self._launch_async()
+
+    def _launch_async(self):
+        with self._lock:
+            self._launching += 1
+        threading.Thread(target=self._launch_one, daemon=True).start()
+
+    def _launch_one(self):
+        try:
+            browser = self.launch()
+        except Exception as e:
+            print(f"⚠️ Warm browser launch failed: {e}")
+            browser = None
+        if browser is not None and self._closed:
+            self._quit(browser)
+        else:
+            self._ready.put(browser)
+        with self._lock:
+            self._launching -= 1  # Only now, so close() waits for the quit above
+
+    def _refill(self):
+        with self._lock:
+            short = self.spares - (self._ready.qsize() + self._launching)
+        for _ in range(max(0, short)):
+            self._launch_async()
+
+    # --- Handing out and taking back ---
+    def acquire(self):
+        """A warm browser if one is ready or on its way, a fresh launch otherwise."""
+        with self._lock:
+            idle = self._ready.empty() and not self._launching
+        if idle:
+            self._launch_async()
+        browser = self._ready.get()
+        if browser is None:
+            browser = self.launch()  # The warm launch failed; fail (or succeed) in the caller's thread
+        with self._lock:
+            self._pages[id(browser)] = 0
+        self._refill()
+        return browser
+
+    def retire(self, browser):
+        """Quits a browser off the caller's critical path."""
+        thread = threading.Thread(target=self._quit, args=(browser,), daemon=True)
+        with self._lock:
+            self._pages.pop(id(browser), None)
+            self._quitting = [t for t in self._quitting if t.is_alive()] + [thread]
+        thread.start()
+
+    def replace(self, browser):
+        """Retires a recycled or broken browser and hands back a warm one."""
+        self.retire(browser)
+        return self.acquire()
+
+    def recycle(self, browser):
+        """replace() for a browser that is due (page_done), counted in self.recycled."""
+        with self._lock:
+            self.recycled += 1
+        return self.replace(browser)
+
+    def _quit(self, browser):
+        try:
+            self.quit(browser)
+        except Exception as e:
+            print(f"⚠️ Browser quit failed: {e}")
+
+    def close(self):
+        """Quits the spares and waits for retired browsers; ones still handed out are their workers' to retire."""
+        with self._lock:
+            self._closed = True
+            quitting = list(self._quitting)
+        while self._launching:
+            time.sleep(0.1)  # Spares still starting quit themselves once closed
+        while True:
+            try:
+                browser = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if browser is not None:
+                self._quit(browser)
+        for thread in quitting:
+            thread.join()
+
+    # --- Recycling ---
+    def page_done(self, browser, pages=1):
+        """Counts loaded pages; returns why the browser is due for recycling, or None."""
+        with self._lock:
+            before = self._pages.get(id(browser), 0)
+            count = self._pages[id(browser)] = before + pages
+        if self.recycle_pages and count >= self.recycle_pages:
+            return f"{count} pages"
+        if self.recycle_rss_mb and count // RSS_CHECK_EVERY > before // RSS_CHECK_EVERY:
+            try:
+                rss = tree_rss_mb(self.pid(browser))
+            except Exception:
+                return None
+            if rss >= self.recycle_rss_mb:
+                return f"{rss:.0f} MB resident"
+        return None
+
+    # --- Memory-pressure admission ---
+    def admit(self):
+        """Blocks while system memory is above the high-water mark (at most MEMORY_HOLD_MAX_SECONDS)."""
+        if not self.memory_high_percent:
+            return
+        started = time.monotonic()
+        while psutil.virtual_memory().percent >= self.memory_high_percent:
+            waited = time.monotonic() - started
+            if waited >= MEMORY_HOLD_MAX_SECONDS:
+                print(f"🧠 Memory still above {self.memory_high_percent}% after {waited:.0f}s, loading anyway")
+                break
+            time.sleep(MEMORY_POLL_SECONDS)
+        held = time.monotonic() - started
+        if held >= MEMORY_POLL_SECONDS:
+            with self._lock:
+                self.held_seconds += held
@@ -0,0 +1,333 @@
+import json
+import time
+import base64
+import itertools
+import threading
+
+import websocket  # websocket-client, installed with selenium
+
+# === DevTools Protocol ===
+# Minimal CDP session over the page target's websocket, for the parts of the
+# protocol selenium's execute_cdp_cmd cannot do (anything event-driven).
+CDP_TIMEOUT = 10
+DIALOG_SETTLE_SECONDS = 0.5  # After the load event, for payloads on timers, onfocus, animations...
+DIALOG_BUFFER = "__xssDialogCalls"
+DIALOG_CALLS_FILE = "dialog_calls.jsonl"  # Every hooked call of a firing page, one JSON object per line
+
+# Installed on every new document (every frame) before its own scripts run:
+# alert/prompt/confirm/print record the call instead of opening anything.
+# Same-origin frames (srcdoc, javascript: iframes) record into the top page.
+DIALOG_HOOK_SCRIPT = """
+(function () {
+  var name = "%s";
+  function sink() {
+    try { return window.top[name] || (window.top[name] = []); }
+    catch (e) { return window[name] || (window[name] = []); }
+  }
+  function recorder(fn, result) {
+    return function () {
+      var args = Array.prototype.map.call(arguments, function (arg) {
+        try { return String(arg); } catch (e) { return "?"; }
+      });
+      var stack = (new Error().stack || "").split("\\n").slice(2, 5).join("\\n");
+      sink().push({fn: fn, args: args, stack: stack, frame: String(location.href).slice(0, 200)});
+      return result;
+    };
+  }
+  window.alert = recorder("alert", undefined);
+  window.prompt = recorder("prompt", "");
+  window.confirm = recorder("confirm", true);
+  window.print = recorder("print", undefined);
+})();
+""" % DIALOG_BUFFER
+
+
+class CdpSession:
+    """One websocket to one page target; commands are synchronous, events go to handlers on a reader thread."""
+
+    def __init__(self, ws_url, timeout=CDP_TIMEOUT):
+        self.timeout = timeout
+        self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self._ids = itertools.count(1)
+        self._pending = {}  # command id -> [threading.Event, response]
+        self._handlers = {}
+        self._send_lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def on(self, method, handler):
+        self._handlers[method] = handler
+
+    def send(self, method, params=None, wait=True):
+        command_id = next(self._ids)
+        slot = [threading.Event(), None]
+        if wait:
+            self._pending[command_id] = slot
+        with self._send_lock:
+            self._ws.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        if not wait:
+            return None
+        if not slot[0].wait(self.timeout):
+            self._pending.pop(command_id, None)
+            raise TimeoutError(f"CDP {method} timed out")
+        response = slot[1]
+        if "error" in response:
+            raise RuntimeError(f"CDP {method}: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    def _read_loop(self):
+        while not self.closed:
+            try:
+                message = json.loads(self._ws.recv())
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception:
+                break  # Tab closed or browser gone
+
+            if "id" in message:
+                slot = self._pending.pop(message["id"], None)
+                if slot:
+                    slot[1] = message
+                    slot[0].set()
+            elif message.get("method") in self._handlers:
+                try:
+                    self._handlers[message["method"]](message.get("params", {}))
+                except Exception as e:
+                    print(f"[⚠️] CDP handler for {message['method']} failed: {e}")
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+
+def debugger_address(driver):
+    """host:port of the DevTools endpoint of a chromedriver-launched Chrome."""
+    return driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+
+def page_ws_url(address, handle):
+    """chromedriver window handles are DevTools target ids, so the page websocket can be built directly."""
+    return f"ws://{address}/devtools/page/{handle}"
+
+
+class DocumentInterceptor:
+    """
+    Fulfils top-level document requests from a ResponseStore through the CDP
+    Fetch domain, one session per tab. Documents missing from the store and
+    every subresource go to the network, unless block_subresources is set,
+    in which case subresources are failed instead.
+    """
+
+    def __init__(self, driver, store, block_subresources=False, address=None):
+        self.driver = driver
+        self.address = address or debugger_address(driver)
+        self.store = store
+        self.block_subresources = block_subresources
+        self.served = 0
+        self.fetched = 0
+        self._sessions = {}  # window handle -> CdpSession
+        self._lock = threading.Lock()
+
+    def attach(self, handle=None):
+        """Starts intercepting on a tab (the current one by default); cheap once attached."""
+        handle = handle or self.driver.current_window_handle
+        session = self._sessions.get(handle)
+        if session and not session.closed:
+            return
+
+        session = CdpSession(page_ws_url(self.address, handle))
+        session.on("Fetch.requestPaused", lambda event: self._paused(session, event))
+        if self.block_subresources:
+            patterns = [{"urlPattern": "*", "requestStage": "Request"}]
+        else:
+            patterns = [{"urlPattern": "*", "resourceType": "Document", "requestStage": "Request"}]
+        session.send("Fetch.enable", {"patterns": patterns})
+        self._sessions[handle] = session
+
+    def detach(self, handle):
+        session = self._sessions.pop(handle, None)
+        if session:
+            session.close()
+
+    def _paused(self, session, event):
+        request_id = event["requestId"]
+        if event.get("resourceType") != "Document":
+            session.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"}, wait=False)
+            return
+
+        stored = self.store.get(event["request"]["url"])
+        if stored is None:
+            with self._lock:
+                self.fetched += 1
+            session.send("Fetch.continueRequest", {"requestId": request_id}, wait=False)
+            return
+
+        with self._lock:
+            self.served += 1
+        # The live response's headers, so its CSP, framing rules and cookies still apply
+        headers = [{"name": name, "value": value} for name, value in stored.headers]
+        if stored.content_type is None:
+            headers.append({"name": "Content-Type", "value": "text/html"})
+        session.send("Fetch.fulfillRequest", {
+            "requestId": request_id,
+            "responseCode": stored.status_code,
+            "responseHeaders": headers,
+            "body": base64.b64encode(stored.body).decode(),
+        }, wait=False)
+
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+
+
+class TabDialogs:
+    """Load and dialog state of one tab since it was last armed."""
+
+    def __init__(self, session):
+        self.session = session
+        self.condition = threading.Condition()
+        self.loaded_at = None
+        self.dialogs = []  # (type, message) in the order they opened
+        self.calls = []  # Hooked calls: {"fn", "args", "stack", "frame"}, in call order
+
+
+class DialogWatcher:
+    """
+    Detects alert/prompt/confirm from Page.javascriptDialogOpening events
+    instead of sleeping and polling for an alert. Dialogs are accepted as
+    they open, so a payload never blocks the page (or chromedriver).
+    wait() returns on the first dialog, or a settle window after the load
+    event when none opens: a clean page costs its real load time.
+
+    With hook=True, DIALOG_HOOK_SCRIPT replaces the dialog functions on
+    every new document, so nothing modal ever opens and every call (with
+    its arguments and a stack snippet) is kept; wait() then collects them
+    with one Runtime.evaluate after the settle window, or the timeout. Real
+    dialogs, from frames the hook could not reach, are still caught as events.
+    """
+
+    def __init__(self, driver, settle=DIALOG_SETTLE_SECONDS, hook=False, address=None):
+        self.driver = driver  # None when Chrome is driven without chromedriver; pass handles explicitly then
+        self.address = address or debugger_address(driver)
+        self.settle = settle
+        self.hook = hook
+        self._tabs = {}  # window handle -> TabDialogs
+
+    def arm(self, handle=None):
+        """Attaches to a tab (the current one by default) and forgets what it saw; call before navigating."""
+        handle = handle or self.driver.current_window_handle
+        tab = self._tabs.get(handle)
+        if tab is None or tab.session.closed:
+            session = CdpSession(page_ws_url(self.address, handle))
+            tab = TabDialogs(session)
+            session.on("Page.javascriptDialogOpening", lambda event: self._opening(tab, event))
+            session.on("Page.loadEventFired", lambda event: self._loaded(tab))
+            session.send("Page.enable")
+            if self.hook:
+                session.send("Page.addScriptToEvaluateOnNewDocument", {"source": DIALOG_HOOK_SCRIPT})
+            self._tabs[handle] = tab
+        with tab.condition:
+            tab.loaded_at = None
+            tab.dialogs = []
+            tab.calls = []
+        return handle
+
+    def navigate(self, url, handle=None):
+        """
+        Starts a navigation without waiting for its load, so many tabs can
+        load at once. Returns Chrome's error text (net::ERR_...) if the
+        request itself failed, None otherwise.
+        """
+        handle = handle or self.driver.current_window_handle
+        return self._tabs[handle].session.send("Page.navigate", {"url": url}).get("errorText")
+
+    def session(self, handle=None):
+        """The armed tab's CdpSession, for other per-tab commands (cookies...)."""
+        return self._tabs[handle or self.driver.current_window_handle].session
+
+    def _opening(self, tab, event):
+        tab.session.send("Page.handleJavaScriptDialog", {"accept": True}, wait=False)
+        if event.get("type") == "beforeunload":
+            return  # Leaving the page, not a payload
+        with tab.condition:
+            tab.dialogs.append((event.get("type"), event.get("message", "")))
+            tab.condition.notify_all()
+
+    def _loaded(self, tab):
+        with tab.condition:
+            tab.loaded_at = time.monotonic()
+            tab.condition.notify_all()
+
+    def wait(self, handle=None, timeout=30):
+        """
+        Returns (loaded, first dialog message or None). Tabs that loaded in
+        parallel share the settle window: it runs from each tab's own load event.
+        """
+        tab = self._tabs[handle or self.driver.current_window_handle]
+        with tab.condition:
+            tab.condition.wait_for(lambda: tab.dialogs or tab.loaded_at is not None, timeout)
+            if not tab.dialogs and tab.loaded_at is not None:
+                remaining = tab.loaded_at + self.settle - time.monotonic()
+                if remaining > 0:
+                    tab.condition.wait_for(lambda: tab.dialogs, remaining)
+            loaded = tab.loaded_at is not None or bool(tab.dialogs)
+            message = tab.dialogs[0][1] if tab.dialogs else None
+
+        if self.hook:
+            # Collected on a timeout too: a payload can fire on a page whose load event never comes
+            tab.calls = self._collect(tab)
+            dialog_calls = [call for call in tab.calls if call.get("fn") != "print"]
+            if message is None and dialog_calls:
+                message = (dialog_calls[0].get("args") or [""])[0]
+                loaded = True  # As for a real dialog: the page ran far enough to fire
+        return loaded, message
+
+    def _collect(self, tab):
+        """Every hooked call the page made, in one round trip."""
+        try:
+            result = tab.session.send("Runtime.evaluate", {
+                "expression": f"JSON.stringify(window[{json.dumps(DIALOG_BUFFER)}] || [])",
+                "returnByValue": True,
+            })
+            return json.loads(result.get("result", {}).get("value") or "[]")
+        except (RuntimeError, TimeoutError, ValueError):
+            return []
+
+    def calls(self, handle=None):
+        """The hooked calls collected by the last wait() on a tab."""
+        tab = self._tabs.get(handle or self.driver.current_window_handle)
+        return tab.calls if tab else []
+
+    def detach(self, handle):
+        tab = self._tabs.pop(handle, None)
+        if tab:
+            tab.session.close()
+
+    def close(self):
+        for tab in self._tabs.values():
+            tab.session.close()
+        self._tabs.clear()
+
+
+_calls_lock = threading.Lock()
+
+
+def log_dialog_calls(url, calls, path=DIALOG_CALLS_FILE):
+    """Appends a page's hooked calls (fn, args, stack snippet, frame) to the calls log."""
+    if not calls:
+        return
+    lines = [json.dumps({"url": url, **call}, separators=(",", ":")) for call in calls]
+    with _calls_lock:
+        with open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def call_arguments(calls):
+    """First argument of each hooked alert/prompt/confirm call, e.g. for nonce attribution."""
+    return [call["args"][0] for call in calls if call.get("args") and call.get("fn") != "print"]
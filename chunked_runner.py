@@ -0,0 +1,199 @@
+import time
+import socket
+import threading
+
+from adaptive_concurrency import host_of
+from browser_backend import BROWSER_ERRORS
+from browser_pool import BrowserPool
+from response_store import RESPONSE_STORE_DIR
+
+# === Chunked Tab Runners ===
+# xss_classic/xss_parrell_tab_final.py and xss_poly/poly_xss_detector_final.py
+# give each worker thread a list of chunks of tabs_count URLs and a
+# browser_backend.py browser from a warm BrowserPool, recycled between waves
+# once it has loaded too many pages or grown too large. A chunk opens in
+# waves: every URL whose host has a free slot in the adaptive limiter opens
+# a tab at once, the rest wait for the next wave. The runners only differ
+# in their config, how they resume, and what they keep of a hit; everything
+# else lives here.
+
+
+def check_internet():
+    try:
+        socket.create_connection(("1.1.1.1", 53), timeout=2)
+        return True
+    except:
+        return False
+
+
+class ChunkedRunner:
+    """
+    The shared part of one chunked runner. launch() starts a browser_backend
+    browser for the pool, pool_settings are BrowserPool's spares/recycling/
+    memory knobs; resume(url, index) records the URL about to load and its
+    index in the runner's input. failed_file collects URLs that failed to
+    open or load, screenshot_log screenshots every hit, when given.
+    """
+
+    def __init__(self, results, launch, host_limiter, host_breaker, skip_log, alert_file, resume,
+                 tabs_count, tab_load_timeout=30, response_store=None, failed_file=None, screenshot_log=None,
+                 **pool_settings):
+        self.results = results
+        self.browser_pool = BrowserPool(launch, quit=self.quit_browser, **pool_settings)
+        self.host_limiter = host_limiter
+        self.host_breaker = host_breaker
+        self.skip_log = skip_log
+        self.alert_file = alert_file
+        self.resume = resume
+        self.tabs_count = tabs_count
+        self.tab_load_timeout = tab_load_timeout
+        self.response_store = response_store
+        self.failed_file = failed_file
+        self.screenshot_log = screenshot_log
+        self.served = 0  # Page loads fulfilled from the response store, by browsers that quit
+        self._lock = threading.Lock()
+
+    def quit_browser(self, browser):
+        with self._lock:
+            self.served += browser.served
+        browser.quit()
+
+    def record_load(self, url, loaded, error):
+        """Load timeouts and network errors (net::ERR_...) count against the host's circuit."""
+        host = host_of(url)
+        if not loaded or (error or "").startswith("net::ERR_"):
+            self.host_breaker.record_failure(host)
+        else:
+            self.host_breaker.record_success(host)
+
+    def record_failed(self, url):
+        if self.failed_file:
+            with open(self.failed_file, "a") as ff:
+                ff.write(url + "\n")
+
+    def worker(self, name, chunks):
+        """Tests (first index, URLs) chunks from tab_engine.worker_chunks on pooled browsers."""
+        if not chunks:
+            return
+        browser = self.browser_pool.acquire()
+        print(f"[{name}] 🌐 Browser backend: {browser.name}")
+
+        for index_offset, chunk in chunks:
+            # Positions in the unfiltered chunk, so the resume index still points into the input
+            positions = [i for i, url in enumerate(chunk) if not self.results.should_skip(url)]
+            chunk = [chunk[i] for i in positions]
+
+            while chunk:
+                self.browser_pool.admit()  # Held while system memory is nearly full
+                # Host slots for as many of the chunk's URLs as their hosts' limits allow, in one step;
+                # the rest wait for the next wave rather than bursting past the limit
+                taken, started = self.host_limiter.acquire_prefix([host_of(url) for url in chunk])
+                wave, chunk = chunk[:taken], chunk[taken:]
+                wave_positions, positions = positions[:taken], positions[taken:]
+                if not self.run_wave(name, browser, wave, [index_offset + i for i in wave_positions], started):
+                    self.browser_pool.retire(browser)
+                    return
+
+                # Every tab of the wave is closed: the browser can be swapped without losing a URL
+                reason = self.browser_pool.page_done(browser, pages=len(wave))
+                if not browser.alive():
+                    print(f"[{name}] 💥 Lost the browser, switching to a warm one...")
+                    browser = self.browser_pool.replace(browser)
+                elif reason:
+                    print(f"[{name}] ♻️ Recycling the browser after {reason}")
+                    browser = self.browser_pool.recycle(browser)
+
+        self.browser_pool.retire(browser)
+
+    def run_wave(self, name, browser, wave, indexes, started):
+        """Opens a tab per URL, all loading at once, and checks each as its events come in; False when offline."""
+        load_ok = [False] * len(wave)
+        handles = [None] * len(wave)
+        errors = [None] * len(wave)
+        opened = []
+        try:
+            for i, url in enumerate(wave):
+                self.resume(url, indexes[i])
+                if not check_internet():
+                    print(f"[{name}] ❌ No internet. Exiting to resume later.")
+                    return False
+                if not self.host_breaker.allow(host_of(url)):
+                    print(f"[{name}] ⛔ Host circuit open, skipping: {url}")
+                    self.skip_log.record(url)
+                    load_ok[i] = None  # Never sent: says nothing about the host's limit
+                    continue
+                try:
+                    handle = browser.new_tab()
+                    opened.append(handle)
+                    errors[i] = browser.navigate(handle, url)
+                    handles[i] = handle
+                except BROWSER_ERRORS as e:
+                    self.host_breaker.abandon(host_of(url))  # Browser-side failure, the host was never asked
+                    print(f"[{name}] ❌ Failed to open: {url} | {e}")
+                    self.record_failed(url)
+
+            for i, handle in enumerate(handles):
+                if handle is not None:
+                    load_ok[i] = self.check_tab(name, browser, handle, wave[i], errors[i])
+        finally:
+            # Loaded or not, every tab of the wave is done with its host
+            for url, ok in zip(wave, load_ok):
+                self.host_limiter.release(host_of(url), started, ok)
+            for handle in opened:
+                try:
+                    browser.close_tab(handle)
+                except BROWSER_ERRORS as e:
+                    print(f"[{name}] ⚠️ Failed to close a tab: {e}")
+        return True
+
+    def check_tab(self, name, browser, handle, url, error):
+        """Waits for the tab's load and dialog events and records the result; returns whether it loaded."""
+        try:
+            loaded, alert_text = browser.outcome(handle, self.tab_load_timeout)
+        except BROWSER_ERRORS as e:
+            print(f"[{name}] ⚠️ Lost tab: {url} | {e}")
+            self.host_breaker.abandon(host_of(url))
+            loaded, alert_text = False, None
+        else:
+            self.record_load(url, loaded, error)
+        if loaded:
+            self.results.loaded(url)
+        else:
+            print(f"[{name}] ⏳ Timeout while loading: {url}")
+            self.record_failed(url)
+
+        if alert_text is None:
+            print(f"[{name}] ✅ No XSS popup on: {url}")
+            if loaded:
+                self.results.record(url, None)
+            return loaded
+
+        calls = browser.calls(handle)
+        print(f"[{name}] 🛑 XSS detected: {url} | Alert: {alert_text}")
+        if len(calls) > 1:
+            print(f"[{name}] 🔔 {len(calls)} dialog calls recorded on: {url}")
+        with open(self.alert_file, "a") as af:
+            af.write(url + "\n")
+        self.results.record(url, alert_text, calls)
+
+        if self.screenshot_log:
+            screenshot_name = f"{int(time.time())}_{name}_xss.png"
+            try:
+                browser.screenshot(handle, screenshot_name)
+                with open(self.screenshot_log, "a") as sf:
+                    sf.write(f"{url} -> {screenshot_name}\n")
+            except BROWSER_ERRORS as e:
+                print(f"[{name}] ⚠️ Screenshot failed: {e}")
+        return loaded
+
+    def report(self):
+        """The end-of-run summary: pool, skipped hosts, the trackers' files, the response store."""
+        if self.browser_pool.recycled:
+            print(f"♻️ {self.browser_pool.recycled} browsers recycled for page count or memory")
+        if self.browser_pool.held_seconds:
+            print(f"🧠 Page loads held {self.browser_pool.held_seconds:.0f}s in total under memory pressure")
+        if self.skip_log.count:
+            print(f"⛔ {self.skip_log.count} URLs skipped on dead hosts, re-queue them from {self.skip_log.path}")
+        self.results.save()
+        if self.response_store is not None:
+            print(f"💾 {self.served} page loads served from {RESPONSE_STORE_DIR}/ instead of the network")
@@ -0,0 +1,118 @@
+import time
+import threading
+
+# === Circuit Breaker Config ===
+FAILURE_THRESHOLD = 5    # Consecutive timeouts/connection errors before a host is cut off
+OPEN_SECONDS = 60        # How long an open host fails fast before one probe is let through
+MAX_OPEN_SECONDS = 900   # Cap for the doubling cool-down of hosts that keep failing
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending work to a host whose circuit is open."""
+
+
+class HostCircuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0         # Consecutive
+        self.opened_at = 0.0
+        self.open_seconds = OPEN_SECONDS
+        self.probing = False      # Half-open probe already handed out
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker shared by every worker of a stage (thread-safe,
+    and non-blocking so asyncio code can call it directly).
+    CLOSED: work flows. OPEN after FAILURE_THRESHOLD consecutive failures:
+    everything for the host fails fast. HALF-OPEN once the cool-down is over:
+    a single probe decides between CLOSED again and a longer OPEN.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, open_seconds=OPEN_SECONDS, max_open_seconds=MAX_OPEN_SECONDS):
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _circuit(self, host):
+        if host not in self._hosts:
+            circuit = HostCircuit()
+            circuit.open_seconds = self.open_seconds
+            self._hosts[host] = circuit
+        return self._hosts[host]
+
+    def allow(self, host):
+        """True if work may go to the host now. Call once per request/page load."""
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN and time.monotonic() - circuit.opened_at >= circuit.open_seconds:
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return True
+            return False
+
+    def record_success(self, host):
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state != CLOSED:
+                print(f"[🔌] Circuit closed again for {host}")
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+            circuit.open_seconds = self.open_seconds
+
+    def record_failure(self, host):
+        """Only timeouts and connection errors belong here, not HTTP error pages."""
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN:
+                # The probe failed too: stay away twice as long
+                circuit.open_seconds = min(circuit.open_seconds * 2, self.max_open_seconds)
+                self._open(host, circuit)
+            elif circuit.state == CLOSED and circuit.failures >= self.threshold:
+                self._open(host, circuit)
+
+    def abandon(self, host):
+        """Work allowed through never reached the host: a half-open probe is handed out again."""
+        with self._lock:
+            self._circuit(host).probing = False
+
+    def _open(self, host, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.probing = False
+        print(f"[⛔] Circuit open for {host} after {circuit.failures} failures, failing fast for {circuit.open_seconds}s")
+
+    def is_open(self, host):
+        with self._lock:
+            return self._circuit(host).state != CLOSED
+
+    def snapshot(self):
+        with self._lock:
+            return {host: {"state": c.state, "failures": c.failures} for host, c in self._hosts.items()}
+
+
+class SkipLog:
+    """Thread-safe append-only file of work skipped because its host's circuit was open."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, line):
+        with self._lock:
+            self.count += 1
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
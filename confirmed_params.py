@@ -0,0 +1,52 @@
+import threading
+
+from response_fingerprint import fingerprint_scope
+
+# === Early Stop per Parameter ===
+# Once one payload fires on a (host, path, param), every other payload URL
+# for it is a wasted page load. Runners confirm a parameter on its first
+# alert and ask before each load whether the URL's parameter is done.
+SKIPPED_AFTER_CONFIRMATION_FILE = "skipped_after_confirmation.txt"
+
+
+class ConfirmedParams:
+    """Thread-safe set of confirmed (host, path, param) scopes, shared by all workers of a runner."""
+
+    def __init__(self, params, path=SKIPPED_AFTER_CONFIRMATION_FILE, enabled=True):
+        self.params = params  # url -> injected param, from the constructed lines
+        self.path = path
+        self.enabled = enabled
+        self.skipped = 0
+        self._confirmed = set()
+        self._lock = threading.Lock()
+
+    def _scopes(self, url, param=None):
+        # Multi-injection URLs carry "a,b,..." as their param
+        params = param or self.params.get(url)
+        return [fingerprint_scope(url, name) for name in params.split(",")] if params else []
+
+    def confirm(self, url, param=None):
+        """Confirms the URL's param; multi-injection URLs need the param the alert was attributed to."""
+        scopes = self._scopes(url, param)
+        if len(scopes) != 1:
+            return
+        scope = scopes[0]
+        with self._lock:
+            if scope not in self._confirmed:
+                self._confirmed.add(scope)
+                print(f"🎯 {scope} confirmed, its remaining payloads will be skipped")
+
+    def is_confirmed(self, url, param=None):
+        scopes = self._scopes(url, param)
+        with self._lock:
+            return bool(scopes) and all(scope in self._confirmed for scope in scopes)
+
+    def should_skip(self, url):
+        """True (and logged to the skip file) if every param the URL injects into was already confirmed."""
+        if not self.enabled or not self.is_confirmed(url):
+            return False
+        with self._lock:
+            self.skipped += 1
+            with open(self.path, "a") as f:
+                f.write(f"{url} | {self.params[url]}\n")
+        return True
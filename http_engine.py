@@ -0,0 +1,210 @@
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from adaptive_concurrency import AsyncAdaptiveLimiter
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# === Config ===
+MAX_CONCURRENCY = 100      # Requests in flight across all hosts
+MAX_PER_HOST = 10          # Ceiling for the adaptive per-host limit
+KEEPALIVE_EXPIRY = 30      # Seconds an idle pooled connection is kept open
+REQUEST_TIMEOUT = 30
+MAX_BODY_BYTES = 2 * 1024 * 1024  # Stop reading a response body after this many bytes
+CONTEXT_WINDOW = 8192  # Bytes kept before each found marker to classify its context
+TEXT_CONTENT_TYPES = ("text/", "html", "xml", "json", "javascript")
+
+
+def host_key(url):
+    """Returns the scheme://host:port key used to pool and limit requests."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+def is_text_content(content_type):
+    """Missing Content-Type is treated as text, anything binary is not worth scanning."""
+    if not content_type:
+        return True
+    mime = content_type.split(";")[0].strip().lower()
+    return any(kind in mime for kind in TEXT_CONTENT_TYPES)
+
+
+class ScanResult:
+    """Outcome of a streamed marker scan: which markers were seen and why reading stopped."""
+
+    def __init__(self, status_code, url):
+        self.status_code = status_code
+        self.url = url
+        self.found = set()
+        self.before = {}  # marker -> bytes that preceded its first reflection
+        self.bytes_read = 0
+        self.body = None  # Only filled in by read()
+        self.content_type = None
+        self.headers = []  # (name, value) pairs, repeated headers kept; only filled in by read()
+        self.stopped = "eof"  # eof | found | size-cap | non-text
+
+
+class SlotOutcome:
+    """Filled in by the request made inside a slot; no status means it never got an answer."""
+
+    def __init__(self):
+        self.status_code = None
+
+    @property
+    def ok(self):
+        return self.status_code is not None and HttpEngine.healthy(self.status_code)
+
+
+class HttpEngine:
+    """
+    Shared asyncio HTTP client for the pipeline stages.
+    Keeps keep-alive connections pooled per host (HTTP/2 when the server
+    offers it) and caps concurrency in total and per host. The per-host cap
+    is adaptive (AIMD): it grows while a host answers quickly and halves on
+    timeouts, connection errors, 429s and 5xx. A per-host circuit breaker
+    makes every request to a dead or stalled host fail fast with
+    CircuitOpenError instead of waiting out its timeout.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_per_host=MAX_PER_HOST,
+                 timeout=REQUEST_TIMEOUT, max_body=MAX_BODY_BYTES, http2=True):
+        self.max_body = max_body
+        self.limiter = AsyncAdaptiveLimiter(maximum=max_per_host)
+        self.breaker = CircuitBreaker()
+        self._total_slots = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            http2=http2 and HTTP2_AVAILABLE,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self._client.aclose()
+
+    @staticmethod
+    def healthy(status_code):
+        """429s and 5xx count against the host like timeouts do."""
+        return status_code != 429 and status_code < 500
+
+    @asynccontextmanager
+    async def _slot(self, url):
+        """
+        Host slot (adaptive limit, then circuit breaker) and a total slot.
+        The request made inside reports its status through the yielded outcome.
+        """
+        # Wait on the host first so a busy host does not pin total slots
+        host = host_key(url)
+        started = await self.limiter.acquire(host)
+        if not self.breaker.allow(host):
+            await self.limiter.release(host, started, None)
+            raise CircuitOpenError(host)
+
+        outcome = SlotOutcome()
+        charged = True
+        try:
+            async with self._total_slots:
+                yield outcome
+        except (httpx.TransportError, httpx.TimeoutException):
+            outcome.status_code = None  # A read timeout mid-body still counts against the host
+            raise
+        except BaseException:
+            # A local bug or a cancellation says nothing about the host, unless it had already answered
+            charged = outcome.status_code is not None
+            raise
+        finally:
+            if not charged:
+                self.breaker.abandon(host)
+                await self.limiter.release(host, started, None)
+            else:
+                if outcome.status_code is None:
+                    self.breaker.record_failure(host)
+                else:
+                    self.breaker.record_success(host)
+                await self.limiter.release(host, started, outcome.ok)
+
+    async def scan(self, url, markers):
+        """
+        Streams the body and searches the raw bytes for each marker, carrying
+        an overlap between chunks so a marker split across a boundary is still
+        found. Reading stops as soon as every marker is seen, at max_body bytes,
+        or straight away on a non-text Content-Type. The CONTEXT_WINDOW bytes
+        before each first reflection are kept for context classification.
+        """
+        needles = {marker: marker.encode() for marker in markers}
+        keep = max(max(len(needle) for needle in needles.values()) - 1, CONTEXT_WINDOW)
+
+        async with self._slot(url) as outcome:
+            async with self._client.stream("GET", url) as r:
+                outcome.status_code = r.status_code
+                result = ScanResult(r.status_code, str(r.url))
+                if not is_text_content(r.headers.get("content-type")):
+                    result.stopped = "non-text"
+                    return result
+
+                tail = b""
+                async for chunk in r.aiter_bytes():
+                    window = tail + chunk
+                    result.bytes_read += len(chunk)
+                    for marker, needle in needles.items():
+                        if marker in result.found:
+                            continue
+                        index = window.find(needle)
+                        if index != -1:
+                            result.found.add(marker)
+                            result.before[marker] = window[max(0, index - CONTEXT_WINDOW):index]
+
+                    if len(result.found) == len(needles):
+                        result.stopped = "found"
+                        break
+                    if result.bytes_read >= self.max_body:
+                        result.stopped = "size-cap"
+                        break
+                    tail = window[-keep:]
+
+                return result
+
+    async def read(self, url):
+        """
+        Streams the body up to max_body bytes and returns a ScanResult with
+        .body set (b"" for non-text responses), for stages that look at the
+        whole page rather than for markers.
+        """
+        async with self._slot(url) as outcome:
+            async with self._client.stream("GET", url) as r:
+                outcome.status_code = r.status_code
+                result = ScanResult(r.status_code, str(r.url))
+                result.body = b""
+                result.content_type = r.headers.get("content-type")
+                result.headers = list(r.headers.multi_items())
+                if not is_text_content(r.headers.get("content-type")):
+                    result.stopped = "non-text"
+                    return result
+
+                chunks = []
+                async for chunk in r.aiter_bytes():
+                    chunks.append(chunk)
+                    result.bytes_read += len(chunk)
+                    if result.bytes_read >= self.max_body:
+                        result.stopped = "size-cap"
+                        break
+                result.body = b"".join(chunks)[:self.max_body]
+                return result
@@ -47,28 +47,49 @@ echo "[5/7] 🏗 Running classic payload constructor..."
 cd xss_classic
 python3 new_constructed_tool.py
 
-# Step 6: Deduplicate constructed URLs
-echo "[6/7] 🧹 Sorting & deduping constructed URLs..."
-sort -u constructed_urls.txt -o constructed_urls.txt
+# Step 6: Drop payloads that come back encoded/stripped before any browser work
+echo "[6/7] 🔎 Pre-screening constructed URLs over HTTP..."
 rm -f resume.log
+python3 ../prescreen.py constructed_urls.txt prescreened_urls.txt
+mv prescreened_urls.txt constructed_urls.txt
 
 # Step 7: Launch final parallel-tab XSS detector
 echo "[7/9] ⚔️ Launching tabbed-parallel XSS runner..."
 python3 xss_parrell_tab_final.py
+
+# Second round: the rest of each payload class whose representative was reflected but did not fire,
+# and single-injection retests of multi-injection URLs that errored or fired without a known nonce
+if [ -s expand_classes.txt ] || [ -s batch_fallback.txt ]; then
+    echo "[7/9] 🧬 Second round: blocked payload classes and unattributed multi-injection URLs..."
+    python3 new_constructed_tool.py --expand
+    rm -f expand_classes.txt batch_fallback.txt resume.log
+    python3 ../prescreen.py constructed_urls.txt prescreened_urls.txt
+    mv prescreened_urls.txt constructed_urls.txt
+    python3 xss_parrell_tab_final.py
+fi
 echo -e "\n✅ XSS Chain Completed!"
 echo "[8/9] ⚔️ Entering pologot tabbed-parallel XSS runner..."
 cd ../
 cd xss_poly
 python3 new_constructed_tooll.py
 
-# Step 6: Deduplicate constructed URLs
-echo "[8/9] 🧹 Sorting & deduping constructed URLs..."
-sort -u constructed_polygots_urls.txt -o constructed_polygots_urls.txt
+echo "[8/9] 🔎 Pre-screening polyglot URLs over HTTP..."
 rm -f resume.log
+python3 ../prescreen.py constructed_polygots_urls.txt prescreened_urls.txt
+mv prescreened_urls.txt constructed_polygots_urls.txt
 
 # Step 7: Launch final parallel-tab XSS detector
 echo "[9/9] ⚔️ Launching tabbed-parallel XSS runner..."
 python3 poly_xss_detector_final.py
 
+if [ -s expand_classes.txt ] || [ -s batch_fallback.txt ]; then
+    echo "[9/9] 🧬 Second round: blocked polyglot classes and unattributed multi-injection URLs..."
+    python3 new_constructed_tooll.py --expand
+    rm -f expand_classes.txt batch_fallback.txt resume.log
+    python3 ../prescreen.py constructed_polygots_urls.txt prescreened_urls.txt
+    mv prescreened_urls.txt constructed_polygots_urls.txt
+    python3 poly_xss_detector_final.py
+fi
+
 
 echo -e "\n✅ XSS Chain Completed!"
@@ -0,0 +1,162 @@
+import re
+import hashlib
+import threading
+
+from reflection_context import filtered_chars, surviving_chars
+from validated_lines import format_validated_line, parse_validated_line
+
+# === Multi-injection URLs ===
+# A URL with several reflected params can test several payloads in one page
+# load. Each payload gets a unique numeric nonce as its alert()/prompt()/
+# confirm() argument, so the dialog text names the param and payload that
+# fired. Batch lines look like
+#   url | a,b | batch=a:<nonce>:<pid>:<cls>:<context>:<filtered>,b:... | base=<original url> | rank=...
+# and fall back to one single-injection URL per param (constructor --expand)
+# when the pre-screen gets an error page or a runner sees an alert it
+# cannot attribute. <filtered> lists the probed chars the param does not let
+# through, so expanded and unbatched payloads keep to what it can carry.
+BATCH_FALLBACK_FILE = "batch_fallback.txt"
+
+# One dialog call with a literal argument (number, string, regex, document.domain/cookie)
+NONCE_CALL_RE = re.compile(
+    r"\b(alert|prompt|confirm)(\s*)"
+    r"(\(\s*(?:\d*|'[^'\\]*'|\"[^\"\\]*\"|/[^/\\]*/|document\.(?:domain|cookie))\s*\)|`[^`$\\]*`)",
+    re.I)
+DIALOG_CALL_RE = re.compile(r"\b(alert|prompt|confirm)\s*[(`]", re.I)
+
+
+def nonce_for(url, param, pid):
+    """
+    Nine digits: needs no quotes and no character a plain alert(1) does not
+    already need. Derived from what it tags, so a rebuilt batch URL is the
+    same URL and the runners' executed-URL log still recognizes it.
+    """
+    digest = hashlib.sha1(f"{url}|{param}|{pid}".encode()).digest()
+    return str(100000000 + int.from_bytes(digest[:8], "big") % 900000000)
+
+
+def with_nonce(payload, nonce):
+    """
+    payload with every dialog argument replaced by nonce, or None unless
+    all its dialog calls have a literal argument to replace.
+    """
+    calls = len(DIALOG_CALL_RE.findall(payload))
+    if not calls or len(NONCE_CALL_RE.findall(payload)) != calls:
+        return None
+    return NONCE_CALL_RE.sub(
+        lambda m: m.group(1) + m.group(2) + (f"`{nonce}`" if m.group(3).startswith("`") else f"({nonce})"), payload)
+
+
+def format_batch(entries):
+    """entries: (param, nonce, pid, cls, context, chars) tuples, chars the ones that survive."""
+    return ",".join(":".join("" if field is None else str(field) for field in (*entry[:5], filtered_chars(entry[5])))
+                    for entry in entries)
+
+
+def batch_entries(meta):
+    """The (param, nonce, pid, cls, context, chars) tuples of a batch line's meta; other empty fields come back None."""
+    entries = []
+    for field in meta.get("batch", "").split(","):
+        if field:
+            param, nonce, pid, cls, context, filtered = field.rsplit(":", 5)
+            entries.append((param, nonce, pid or None, cls or None, context or None, surviving_chars(filtered)))
+    return entries
+
+
+def format_batch_line(url, entries, base, **meta):
+    return format_validated_line(url, ",".join(entry[0] for entry in entries),
+                                 batch=format_batch(entries), base=base, **meta)
+
+
+class BatchLog:
+    """
+    Thread-safe attribution of runner alerts on batch URLs. A nonce hit
+    confirms its own param and sends the batch's other params back for
+    single-injection retests (the alert may have kept them from running);
+    an alert with no known nonce sends them all back.
+    """
+
+    def __init__(self, confirmed_params, payload_stats, expansion_log=None, path=BATCH_FALLBACK_FILE):
+        self.confirmed_params = confirmed_params
+        self.payload_stats = payload_stats
+        self.expansion_log = expansion_log
+        self.path = path
+        self.batches = {}  # url -> (entries, base)
+        self.pending = {}  # url -> params to retest one by one
+        self.attributed = 0
+        self._lock = threading.Lock()
+
+    def track(self, url, meta):
+        if "batch" in meta:
+            self.batches[url] = (batch_entries(meta), meta.get("base"))
+
+    def alert(self, url, alert_text, others=()):
+        """
+        Returns the params the alert is attributed to (empty if none).
+        others: arguments of further dialog calls the page made, when they
+        were recorded instead of blocking (cdp_client hook mode).
+        """
+        batch = self.batches.get(url)
+        if batch is None:
+            return []
+        entries, _ = batch
+        texts = {(text or "").strip() for text in (alert_text, *others)}
+        fired = [entry for entry in entries if entry[1] in texts]
+        with self._lock:
+            retest = self.pending.setdefault(url, set())
+            retest.update(entry[0] for entry in entries if entry not in fired)
+            if fired:
+                self.attributed += 1
+        if not fired:
+            print(f"❔ Alert {alert_text!r} matches no nonce of the batch, retesting its params one by one: {url}")
+            return []
+        for param, nonce, pid, _, context, _ in fired:
+            print(f"🎯 Nonce {nonce} -> param {param} (payload {pid})")
+            self.confirmed_params.confirm(url, param)
+            if pid:
+                self.payload_stats.record_payload(pid, context, True)
+        return [entry[0] for entry in fired]
+
+    def miss(self, url):
+        """The batch loaded without an alert: every payload in it was tested and missed."""
+        batch = self.batches.get(url)
+        if batch is None:
+            return
+        entries, base = batch
+        for param, _, pid, cls, context, chars in entries:
+            if pid:
+                self.payload_stats.record_payload(pid, context, False)
+            if cls and self.expansion_log is not None:
+                self.expansion_log.add(url, param, context, chars, cls, pid, base=base)
+
+    def save(self):
+        """Appends the batches to retest, leaving out params confirmed since."""
+        lines = []
+        with self._lock:
+            for url, params in self.pending.items():
+                entries, base = self.batches[url]
+                retest = [entry for entry in entries if entry[0] in params
+                          and not self.confirmed_params.is_confirmed(url, entry[0])]
+                if retest:
+                    lines.append(format_batch_line(url, retest, base))
+            self.pending.clear()
+        if lines:
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        return len(lines)
+
+
+def read_fallbacks(path=BATCH_FALLBACK_FILE):
+    """(base url, param, pid, cls, context, chars) per payload to retest as a single injection."""
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            _, _, meta = parse_validated_line(line)
+            base = meta.get("base")
+            for param, _, pid, cls, context, chars in batch_entries(meta):
+                key = (base, param, pid)
+                if base and pid and key not in seen:
+                    seen.add(key)
+                    yield base, param, pid, cls, context, chars
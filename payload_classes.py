@@ -0,0 +1,68 @@
+import threading
+
+from response_fingerprint import fingerprint_scope
+from validated_lines import format_validated_line, parse_validated_line
+
+# === Representative-first Testing ===
+# The constructors emit one payload per equivalence class (tagged | cls=...).
+# A representative that reached the browser was reflected (the pre-screen
+# drops the rest), so one that loads without firing was blocked or only
+# partly ran: its class is worth the full set of variants. Runners log those
+# misses here; "new_constructed_tool.py --expand" turns them into the
+# remaining class members for a second round. Representatives tested inside
+# a multi-injection URL are logged with | base=<original url>, since their
+# own URL carries other params' payloads too.
+EXPAND_CLASSES_FILE = "expand_classes.txt"
+
+
+class ExpansionLog:
+    """Thread-safe record of representatives that loaded without an alert."""
+
+    def __init__(self, path=EXPAND_CLASSES_FILE):
+        self.path = path
+        self.tracked = {}  # url -> (param, meta), representatives only
+        self.pending = {}  # (scope, cls) -> (url, param, line)
+        self._lock = threading.Lock()
+
+    def track(self, url, param, meta):
+        # Expanded lines carry no cls tag, so a second round never expands again
+        if param and "cls" in meta:
+            self.tracked[url] = (param, meta)
+
+    def record(self, url, hit):
+        tracked = self.tracked.get(url)
+        if tracked is None or hit:
+            return
+        param, meta = tracked
+        self.add(url, param, meta.get("context"), meta.get("chars"), meta["cls"], meta.get("pid"))
+
+    def add(self, url, param, context, chars, cls, pid, base=None):
+        # context and chars go along so the expansion keeps to members the param can carry
+        line = format_validated_line(url, param, context=context, chars=chars, cls=cls, pid=pid, base=base)
+        with self._lock:
+            self.pending.setdefault((fingerprint_scope(url, param), cls), (url, param, line))
+
+    def save(self, confirmed_params=None):
+        """Appends the classes to expand, leaving out params another payload already confirmed."""
+        with self._lock:
+            lines = [line for url, param, line in self.pending.values()
+                     if confirmed_params is None or not confirmed_params.is_confirmed(url, param)]
+            self.pending.clear()
+        if lines:
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        return len(lines)
+
+
+def read_expansions(path=EXPAND_CLASSES_FILE):
+    """(url, param, meta) per class to expand, once per (host, path, param) and class."""
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            url, param, meta = parse_validated_line(line)
+            key = (fingerprint_scope(url, param), meta.get("cls"))
+            if param and "cls" in meta and key not in seen:
+                seen.add(key)
+                yield url, param, meta
@@ -0,0 +1,258 @@
+import os
+import re
+import sys
+import json
+from html import unescape
+from urllib.parse import unquote
+
+from reflection_context import payload_contexts, required_chars
+
+# === Payload Compiler ===
+# Turns a raw payload list into a deduplicated, tagged corpus next to it
+# (payloads.txt -> payloads.corpus.json) that the constructors load instead
+# of re-tagging every payload on every run. Each entry carries the probed
+# characters it needs, the reflection contexts it targets, how it fires and
+# its equivalence class: payloads that run through the same kind of vector
+# (script tag, javascript: URL, a family of event handlers...) after the
+# same kind of breakout exercise the same mechanism, so one representative
+# per class is tested first and the --expand round covers the differences
+# inside a class (see payload_constructor.py).
+#
+# Usage:
+#   python3 payload_compiler.py xss_classic/payloads.txt
+#   python3 payload_compiler.py xss_poly/polygots.txt 3   (3 lines per polyglot)
+CORPUS_SUFFIX = ".corpus.json"
+CORPUS_VERSION = 3
+
+# Trigger types
+AUTO = "auto"                # Fires on its own when the page loads
+INTERACTION = "interaction"  # Needs a click, hover, key press... that a headless run never makes
+DEAD = "dead"                # Only relies on features Chrome does not have
+UNKNOWN = "unknown"          # No trigger recognised; kept, the browser decides
+
+AUTO_EVENTS = {
+    "load", "error", "toggle", "loadstart", "progress", "play", "playing", "canplay",
+    "canplaythrough", "loadeddata", "loadedmetadata", "durationchange", "begin", "end",
+    "repeat", "animationstart", "animationend", "animationiteration", "webkitanimationstart",
+    "webkitanimationend", "transitionrun", "transitionstart", "transitionend",
+    "webkittransitionend", "pageshow", "start", "finish", "scroll", "scrollend",
+}
+FOCUS_EVENTS = {"focus", "focusin"}  # Automatic only together with autofocus
+DEAD_EVENTS = {
+    "beforescriptexecute", "afterscriptexecute", "readystatechange", "propertychange",
+    "beforeload", "filterchange",
+}
+# Event handlers grouped by what makes them fire, for equivalence classes
+HANDLER_FAMILIES = {
+    "resource": {"load", "error", "loadstart", "progress", "abort", "loadend"},
+    "media": {"play", "playing", "canplay", "canplaythrough", "loadeddata", "loadedmetadata",
+              "durationchange", "timeupdate", "volumechange", "ended", "pause", "seeked", "seeking"},
+    "toggle": {"toggle", "beforetoggle"},
+    "focus": FOCUS_EVENTS | {"blur", "focusout"},
+    "animation": {"animationstart", "animationend", "animationiteration", "animationcancel",
+                  "webkitanimationstart", "webkitanimationend", "webkitanimationiteration",
+                  "transitionrun", "transitionstart", "transitionend", "transitioncancel", "webkittransitionend"},
+    "svg-timing": {"begin", "end", "repeat"},
+    "marquee": {"start", "finish", "bounce"},
+    "scroll": {"scroll", "scrollend", "resize"},
+    "page": {"pageshow", "pagehide", "hashchange", "popstate", "message", "storage", "unload", "beforeunload"},
+    "key": {"keydown", "keyup", "keypress"},
+    "form": {"input", "beforeinput", "change", "submit", "reset", "select", "invalid", "search",
+             "cut", "copy", "paste", "formdata"},
+}
+HANDLER_FAMILY = {name: family for family, names in HANDLER_FAMILIES.items() for name in names}
+DEAD_FEATURES_RE = re.compile(r"vbscript:|expression\s*\(|-moz-binding|behavior\s*:|dynsrc", re.I)
+
+HANDLER_NAME_RE = re.compile(r"[\s\"'/;]on([a-z]+)\s*=", re.I)
+SCRIPT_TAG_RE = re.compile(r"<\s*script[\s/>]", re.I)
+AUTO_JS_URL_RE = re.compile(r"<\s*(iframe|embed|object)[^>]*?(src|data)\s*=\s*[\"']?\s*javascript:", re.I)
+JS_URL_RE = re.compile(r"javascript:", re.I)
+SCRIPT_CLOSE_RE = re.compile(r"</\s*script", re.I)
+CLOSE_TAG_RE = re.compile(r"</\s*[a-z]", re.I)
+POINTER_EVENT_RE = re.compile(r"mouse|pointer|click|contextmenu|drag|drop|wheel|touch")  # The rest of the interaction handlers
+JS_CALL_RE = re.compile(r"(alert|prompt|confirm|print|eval)\s*[(`]", re.I)
+PAYLOAD_START_RE = re.compile(r"<|javascript:|(alert|prompt|confirm|print|eval)\s*[(`]", re.I)
+
+
+class CorpusPayload:
+    __slots__ = ("id", "payload", "chars", "contexts", "trigger", "variant_of", "class_id")
+
+    def __init__(self, id, payload, chars, contexts, trigger, variant_of=None, class_id=None):
+        self.id = id
+        self.payload = payload
+        self.chars = chars
+        self.contexts = contexts
+        self.trigger = trigger
+        self.variant_of = variant_of  # id of the first payload it only differs from by case/encoding
+        self.class_id = id if class_id is None else class_id  # id of the first payload of its equivalence class
+
+    @property
+    def headless(self):
+        """False for payloads that can never fire on their own in headless Chrome."""
+        return self.trigger in (AUTO, UNKNOWN)
+
+
+def read_raw_payloads(path, group=1):
+    """One payload per non-empty line, or every `group` non-empty lines joined into one."""
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return ["".join(lines[i:i + group]) for i in range(0, len(lines), group)]
+
+
+def variant_key(payload):
+    """Case, URL/HTML encoding and whitespace folded away: equal keys are near-duplicates."""
+    decoded = unescape(unquote(payload))
+    return " ".join(decoded.casefold().split())
+
+
+def vector_family(payload):
+    """How the payload runs: a script tag, the family of its first event handler, a javascript: URL or bare JS."""
+    if SCRIPT_TAG_RE.search(payload):
+        return "script"
+    handlers = HANDLER_NAME_RE.findall(payload)
+    if handlers:
+        name = handlers[0].lower()
+        return "on-" + HANDLER_FAMILY.get(name, "pointer" if POINTER_EVENT_RE.search(name) else "other")
+    if JS_URL_RE.search(payload):
+        return "js-url"
+    if "<" not in payload and JS_CALL_RE.search(payload):
+        return "js"
+    return "other"
+
+
+def breakout_kind(payload):
+    """What the payload closes before its vector starts: a script, a comment, a quoted value, a tag, or nothing."""
+    start = PAYLOAD_START_RE.search(payload)
+    prefix = payload[:start.start()] if start else payload
+    if SCRIPT_CLOSE_RE.search(prefix):
+        return "script"
+    if "-->" in prefix:
+        return "comment"
+    quotes = [c for c in prefix if c in "\"'`"]
+    if quotes:
+        return "quote" + quotes[0]
+    if ">" in prefix or CLOSE_TAG_RE.search(prefix):
+        return "tag"
+    return "none"
+
+
+def equivalence_key(payload):
+    """
+    Vector family and breakout kind. Tag names, handlers within a family,
+    case, encoding and required chars do not count: the constructors pick a
+    representative whose chars survive, and --expand tries the rest.
+    """
+    decoded = unescape(unquote(payload)).replace("+", " ")  # Encoded payloads run through the same vectors
+    return vector_family(decoded), breakout_kind(decoded)
+
+
+def trigger_type(payload):
+    events = {name.lower() for name in HANDLER_NAME_RE.findall(payload)}
+    lower = payload.lower()
+
+    if events & AUTO_EVENTS or (events & FOCUS_EVENTS and "autofocus" in lower):
+        return AUTO
+    if SCRIPT_TAG_RE.search(payload) or AUTO_JS_URL_RE.search(payload):
+        return AUTO
+    if "<" not in payload and JS_CALL_RE.search(payload) and not JS_URL_RE.search(payload):
+        return AUTO  # Plain JS for script contexts: runs with the script it lands in
+    if events - DEAD_EVENTS or JS_URL_RE.search(payload):
+        return INTERACTION
+    if events or DEAD_FEATURES_RE.search(payload):
+        return DEAD
+    return UNKNOWN
+
+
+def compile_payloads(raw_payloads):
+    """Returns (entries, exact duplicates dropped)."""
+    entries = []
+    seen = set()
+    variants = {}
+    classes = {}
+    duplicates = 0
+    for payload in raw_payloads:
+        if payload in seen:
+            duplicates += 1
+            continue
+        seen.add(payload)
+        key = variant_key(payload)
+        chars = required_chars(payload)
+        entry_id = len(entries)
+        class_id = classes.setdefault(equivalence_key(payload), entry_id)
+        entry = CorpusPayload(entry_id, payload, chars, payload_contexts(payload),
+                              trigger_type(payload), variants.get(key), class_id)
+        variants.setdefault(key, entry.id)
+        entries.append(entry)
+    return entries, duplicates
+
+
+def corpus_path(source):
+    return os.path.splitext(source)[0] + CORPUS_SUFFIX
+
+
+def write_corpus(path, source, entries):
+    by_context = {}
+    for entry in entries:
+        for context in entry.contexts:
+            by_context.setdefault(context, []).append(entry.id)
+    corpus = {
+        "version": CORPUS_VERSION,
+        "source": os.path.basename(source),
+        # [payload, chars, contexts, trigger, variant_of, class_id] by id
+        "payloads": [[e.payload, "".join(sorted(e.chars)), sorted(e.contexts), e.trigger, e.variant_of, e.class_id]
+                     for e in entries],
+        "by_context": {context: ids for context, ids in sorted(by_context.items())},
+    }
+    with open(path, "w") as f:
+        json.dump(corpus, f, separators=(",", ":"))
+
+
+def read_corpus(path):
+    with open(path) as f:
+        corpus = json.load(f)
+    if corpus.get("version") != CORPUS_VERSION:
+        return None
+    return [CorpusPayload(i, payload, set(chars), set(contexts), trigger, variant_of, class_id)
+            for i, (payload, chars, contexts, trigger, variant_of, class_id) in enumerate(corpus["payloads"])]
+
+
+def load_corpus(source, group=1):
+    """
+    The compiled corpus for a payload file, rebuilt first if it is missing
+    or older than the file.
+    """
+    path = corpus_path(source)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        entries = read_corpus(path)
+        if entries is not None:
+            return entries
+    entries, _ = compile_payloads(read_raw_payloads(source, group))
+    write_corpus(path, source, entries)
+    return entries
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 payload_compiler.py <payloads file> [lines per payload]")
+        sys.exit(1)
+    source = sys.argv[1]
+    group = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    raw = read_raw_payloads(source, group)
+    entries, duplicates = compile_payloads(raw)
+    path = corpus_path(source)
+    write_corpus(path, source, entries)
+
+    triggers = {}
+    for entry in entries:
+        triggers[entry.trigger] = triggers.get(entry.trigger, 0) + 1
+    variants = sum(1 for entry in entries if entry.variant_of is not None)
+    classes = len({entry.class_id for entry in entries})
+    print(f"[📦] {len(raw)} payloads -> {len(entries)} in {path} "
+          f"({duplicates} exact duplicates dropped, {variants} case/encoding variants marked)")
+    print("[📦] Triggers: " + ", ".join(f"{count} {trigger}" for trigger, count in sorted(triggers.items())))
+    print(f"[📦] {classes} equivalence classes")
+
+
+if __name__ == "__main__":
+    main()
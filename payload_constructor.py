@@ -0,0 +1,218 @@
+import os
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from reflection_context import chars_available, payload_fits
+from payload_classes import EXPAND_CLASSES_FILE, read_expansions
+from multi_injection import BATCH_FALLBACK_FILE, format_batch_line, nonce_for, read_fallbacks, with_nonce
+from validated_lines import format_validated_line, parse_validated_line
+from payload_stats import PayloadStats, payload_id
+from url_templates import UrlTemplate, compile_batch_template, compile_template, encode_payload, encode_payloads
+
+# === Payload URL Construction ===
+# The part of new_constructed_tool.py (classic payloads, URL-encoded) and
+# new_constructed_tooll.py (polyglots, injected raw) that is the same:
+# which payloads fit a reflected param, one representative per equivalence
+# class first, several params per URL behind alert nonces, and the --expand
+# round (remaining class members, single-injection retests of batches).
+# raw=True builds the polyglot constructor's unencoded query strings;
+# check_context=False skips the reflection-context filter for payloads
+# built to run from any context.
+BATCH_MAX_PARAMS = 4
+
+
+class PayloadConstructor:
+    """Turns "url | param | ..." lines into payload URL lines for a compiled corpus."""
+
+    def __init__(self, payloads, raw=False, check_context=True, representatives=True,
+                 batch=True, batch_max_params=BATCH_MAX_PARAMS):
+        self.payloads = payloads
+        self.raw = raw
+        self.check_context = check_context
+        self.representatives = representatives  # One payload per class; the runners ask for the rest when it is blocked
+        self.batch = batch
+        self.batch_max_params = batch_max_params
+        self.encoded = encode_payloads((entry.payload for entry in payloads), raw=raw)  # Encoded once, reused for every URL
+        self.ids = {entry.payload: payload_id(entry.payload) for entry in payloads}
+        self.by_id = {self.ids[entry.payload]: entry for entry in payloads}
+        self.class_members = {}
+        for entry in payloads:
+            self.class_members.setdefault(entry.class_id, []).append(entry)
+        # Best-first payload order per reflection context, from the runners' hit rates
+        self.stats = PayloadStats()
+        self.ordered = {}
+        self.skipped = Counter()
+
+    def payloads_for(self, context):
+        if context not in self.ordered:
+            self.ordered[context] = self.stats.order(self.payloads, context, key=lambda entry: entry.payload)
+        return self.ordered[context]
+
+    # --- First round ---
+    def construct_urls(self, validated_lines):
+        """Yields "url | param | ... | pid=... | rank=... [| cls=...]" lines one at a time."""
+        if self.batch:
+            for url, reflected in url_groups(validated_lines):
+                for i in range(0, len(reflected), self.batch_max_params):
+                    yield from self.batch_urls(url, reflected[i:i + self.batch_max_params])
+            return
+
+        for line in validated_lines:
+            url, param, meta = parse_validated_line(line)
+            # Compiled once per URL: generating each payload's URL is then a concatenation
+            template = compile_template(url, param, raw=self.raw)
+            if template is None:
+                continue  # skip if param not found in query
+            yield from self.payload_urls(template, param, meta, self.payloads_for(meta.get("context")),
+                                         self.representatives)
+
+    def batch_urls(self, url, reflected):
+        """
+        Rank by rank, the payload of every param in one URL, each with its own
+        alert nonce. Payloads whose dialog calls cannot all carry the nonce,
+        and ranks where only one param is left, go out as single injections.
+        """
+        templates = {param: compile_template(url, param, raw=self.raw) for param, _ in reflected}
+        reflected = [(param, meta) for param, meta in reflected if templates[param] is not None]
+        columns = [list(self.fitting_payloads(self.payloads_for(meta.get("context")), meta, self.representatives))
+                   for _, meta in reflected]
+        batch_templates = {}
+
+        for rank in range(max(map(len, columns), default=0)):
+            nonced = []
+            singles = []
+            for (param, meta), column in zip(reflected, columns):
+                if rank >= len(column):
+                    continue
+                entry = column[rank]
+                nonce = nonce_for(url, param, self.ids[entry.payload])
+                payload = with_nonce(entry.payload, nonce)
+                (nonced if payload else singles).append((param, meta, entry, nonce, payload))
+            if len(nonced) < 2:
+                singles += nonced
+                nonced = []
+
+            if nonced:
+                params = tuple(param for param, *_ in nonced)
+                if params not in batch_templates:
+                    batch_templates[params] = compile_batch_template(url, params, raw=self.raw)
+                batch = [(param, nonce, self.ids[entry.payload], entry.class_id if self.representatives else None,
+                          meta.get("context"), meta.get("chars")) for param, meta, entry, nonce, _ in nonced]
+                values = {param: encode_payload(payload, self.raw) for param, _, _, _, payload in nonced}
+                self.skipped["batched"] += len(nonced) - 1
+                yield format_batch_line(batch_templates[params].fill(values), batch, url, rank=rank)
+            for param, meta, entry, _, _ in singles:
+                yield self.single_line(templates[param], param, meta, entry, rank, self.representatives)
+
+    # --- Second round (--expand) ---
+    def second_round(self, expand_file=EXPAND_CLASSES_FILE, fallback_file=BATCH_FALLBACK_FILE):
+        if os.path.exists(expand_file):
+            yield from self.expand_classes(read_expansions(expand_file))
+        if os.path.exists(fallback_file):
+            yield from self.unbatch(read_fallbacks(fallback_file))
+
+    def expand_classes(self, expansions):
+        """The members of each blocked class the representative's round did not test."""
+        for url, param, meta in expansions:
+            representative = self.by_id.get(meta.get("pid"))
+            if representative is None:
+                continue  # payload file changed since the first round
+            if "base" in meta:
+                # Tested inside a multi-injection URL: start again from the original URL
+                template = compile_template(meta["base"], param, raw=self.raw)
+            else:
+                # The representative's URL with its payload cut out is the template
+                prefix, found, suffix = url.partition(self.encoded[representative.payload])
+                template = UrlTemplate(prefix, suffix) if found else None
+            if template is None:
+                continue
+            members = self.stats.order(self.class_members[representative.class_id], meta.get("context"),
+                                       key=lambda entry: entry.payload)
+            members = [entry for entry in members if entry is not representative]
+            yield from self.payload_urls(template, param, meta, members, False)
+
+    def unbatch(self, fallbacks):
+        """Single-injection lines for the payloads of batches that errored or could not be attributed."""
+        for base, param, pid, cls, context, chars in fallbacks:
+            entry = self.by_id.get(pid)
+            template = compile_template(base, param, raw=self.raw)
+            if entry is None or template is None:
+                continue
+            yield self.single_line(template, param, {"context": context, "chars": chars}, entry, 0, cls is not None)
+
+    # --- Payload lines ---
+    def fitting_payloads(self, candidates, meta, representatives):
+        """The candidates that can fire where the param reflects; one per class with representatives."""
+        context = meta.get("context")
+        surviving = meta.get("chars")  # special chars that came back unencoded, None if not probed
+        represented = set()
+        for entry in candidates:
+            if self.check_context and not payload_fits(entry.contexts, context):
+                self.skipped["context"] += 1
+                continue  # payload cannot fire from where this param reflects
+            if not chars_available(entry.chars, surviving):
+                self.skipped["chars"] += 1
+                continue  # payload needs a char the target strips or encodes
+            if representatives:
+                if entry.class_id in represented:
+                    self.skipped["class"] += 1
+                    continue  # its class already has a (better ranked) representative here
+                represented.add(entry.class_id)
+            yield entry
+
+    def payload_urls(self, template, param, meta, candidates, representatives):
+        for rank, entry in enumerate(self.fitting_payloads(candidates, meta, representatives)):
+            yield self.single_line(template, param, meta, entry, rank, representatives)
+
+    def single_line(self, template, param, meta, entry, rank, representative):
+        new_url = template.prefix + self.encoded[entry.payload] + template.suffix
+        # param kept for the pre-screen and runners; pid/rank for hit-rate ordering; cls, context and chars for expansion
+        return format_validated_line(new_url, param, context=meta.get("context"), chars=meta.get("chars"),
+                                     pid=self.ids[entry.payload], rank=rank,
+                                     cls=entry.class_id if representative else None)
+
+
+def url_groups(validated_lines):
+    """
+    (url, [(param, meta), ...]) with the reflected params of one original URL
+    together, for batching. The validator writes one line per reflected
+    param, in which only that param carries its marker, and all lines of a
+    URL in a row: consecutive lines are grouped as they stream in, and url is
+    the URL with every param's original value back.
+    """
+    group = []  # (url, param, meta) of the current original URL
+    for line in validated_lines:
+        url, param, meta = parse_validated_line(line)
+        if group and not same_original(group, url, param):
+            yield group_url(group), [(param, meta) for _, param, meta in group]
+            group = []
+        if all(param != grouped for _, grouped, _ in group):
+            group.append((url, param, meta))
+    if group:
+        yield group_url(group), [(param, meta) for _, param, meta in group]
+
+
+def same_original(group, url, param):
+    """True when url only differs from the group's first line where the two lines' markers were injected."""
+    first_url, first_param, _ = group[0]
+    injected = {first_param, param}
+    return blank_values(first_url, injected) == blank_values(url, injected)
+
+
+def blank_values(url, params):
+    parsed = urlparse(url)
+    query = [(key, "" if key in params else value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)]
+    return parsed._replace(query=urlencode(query)).geturl()
+
+
+def group_url(group):
+    """The first line's URL with its own param's value taken from another line, where it was not injected."""
+    url, param, _ = group[0]
+    if len(group) == 1:
+        return url
+    original = [value for key, value in parse_qsl(urlparse(group[1][0]).query, keep_blank_values=True) if key == param]
+    parsed = urlparse(url)
+    query = []
+    for key, value in parse_qsl(parsed.query, keep_blank_values=True):
+        query.append((key, original.pop(0) if key == param and original else value))
+    return parsed._replace(query=urlencode(query)).geturl()
@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+import threading
+
+# === Payload Hit Rates ===
+# Detections per payload, overall and per reflection context, kept across
+# runs. The constructors order each parameter's payloads best-first and tag
+# lines with | pid=... | rank=...; the runners record every tested URL and
+# run the work rank by rank, so every parameter gets its most productive
+# payloads before anything gets its long tail.
+PAYLOAD_STATS_FILE = "payload_stats.json"
+
+
+def payload_id(payload):
+    """Stable short id of a payload's text, so stats survive edits to the payload file."""
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+class PayloadStats:
+    """Thread-safe hit-rate table; runners record into it, constructors read it."""
+
+    def __init__(self, path=PAYLOAD_STATS_FILE):
+        self.path = path
+        self.overall = {}   # pid -> [tests, hits]
+        self.contexts = {}  # context -> {pid: [tests, hits]}
+        self.tracked = {}   # url -> (pid, context), for the runners
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.overall = data.get("payloads", {})
+            self.contexts = data.get("contexts", {})
+
+    @staticmethod
+    def _rate(counts):
+        # Laplace smoothing: untested payloads sit at 0.5, ahead of ones that keep failing
+        tests, hits = counts
+        return (hits + 1) / (tests + 2)
+
+    def score(self, pid, context=None):
+        """Hit rate in the reflection context when it has data there, overall otherwise."""
+        by_context = self.contexts.get(context, {}) if context else {}
+        if pid in by_context:
+            return self._rate(by_context[pid])
+        return self._rate(self.overall.get(pid, (0, 0)))
+
+    def order(self, entries, context=None, key=lambda entry: entry):
+        """entries sorted best-first for the context; ties keep their order."""
+        return sorted(entries, key=lambda entry: -self.score(payload_id(key(entry)), context))
+
+    def track(self, url, meta):
+        if "pid" in meta:
+            self.tracked[url] = (meta["pid"], meta.get("context"))
+
+    def record(self, url, hit):
+        """Counts one browser test of a tracked URL."""
+        tracked = self.tracked.get(url)
+        if tracked is None:
+            return
+        self.record_payload(*tracked, hit)
+
+    def record_payload(self, pid, context, hit):
+        with self._lock:
+            tables = [self.overall]
+            if context:
+                tables.append(self.contexts.setdefault(context, {}))
+            for table in tables:
+                counts = table.setdefault(pid, [0, 0])
+                counts[0] += 1
+                counts[1] += int(hit)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"payloads": self.overall, "contexts": self.contexts}, separators=(",", ":"))
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
@@ -0,0 +1,261 @@
+import os
+import re
+import sys
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+from http_engine import HttpEngine
+from circuit_breaker import CircuitOpenError, SkipLog
+from validated_lines import format_validated_line, parse_validated_line
+from static_analyzer import analyze_reflection, reflection_spans, BROWSER, INERT, LIKELY
+from response_fingerprint import FingerprintStore, fingerprint_scope, reflection_fingerprint
+from response_store import ResponseStore
+from multi_injection import BATCH_FALLBACK_FILE, batch_entries
+
+# === HTTP Pre-screen ===
+# Sits between the payload constructors and the Chrome runners. Every
+# constructed URL is fetched once over pooled async HTTP; only URLs whose
+# payload core comes back verbatim (not encoded or stripped) are kept, and
+# those pages are tokenized on a process pool (static_analyzer.py) to sort
+# them into inert / likely / browser. Only likely and browser go on to
+# Chrome, tagged with | verdict=... | fp=... URLs whose response fingerprint
+# (response_fingerprint.py) was already executed by a runner, or already
+# claimed by an earlier URL of this run, are duplicates and stay out of
+# the browser. The pages that do go on are kept in response_store/ so the
+# runners can serve the main document from disk instead of refetching it.
+# Payloads that only fire client-side without ever being reflected
+# (DOM XSS through location.*) are out of reach of this check.
+# Multi-injection lines (| batch=...) go on when any of their payloads
+# survives; an error page or failed fetch sends them to batch_fallback.txt
+# to be retested one param at a time.
+#
+# Usage (from xss_classic/ or xss_poly/):
+#   python3 ../prescreen.py constructed_urls.txt prescreened_urls.txt
+
+INPUT_FILE = "constructed_urls.txt"
+OUTPUT_FILE = "prescreened_urls.txt"
+SKIPPED_FILE = "prescreen_skipped.txt"  # URLs on hosts with an open circuit, re-queue from here
+DUPLICATES_FILE = "prescreen_duplicates.txt"  # URLs that would render an already covered response
+MAX_CONCURRENCY = 100
+MAX_PER_HOST = 10
+MAX_IN_FLIGHT = 500
+MAX_BODY_BYTES = 2 * 1024 * 1024
+ANALYZER_WORKERS = os.cpu_count() or 1  # Tokenizing is CPU-bound, one process per core
+STORE_RESPONSES = True  # Keep pages headed for the browser so it does not fetch them again
+
+TAG_SPAN_RE = re.compile(r"<[a-zA-Z!/].*>", re.S)
+
+
+def payload_of(url, param):
+    """The decoded value the constructor injected into param."""
+    values = parse_qs(urlparse(url).query, keep_blank_values=True).get(param)
+    return values[0] if values else None
+
+
+def executable_core(payload):
+    """
+    The part of a payload that has to come back verbatim for it to run:
+    from the first tag to the last '>' for markup payloads, the whole
+    (trimmed) payload for javascript: URLs and script-context payloads.
+    Breakout prefixes like '">' are left out, they only matter in some contexts.
+    """
+    match = TAG_SPAN_RE.search(payload)
+    core = match.group() if match else payload.strip()
+    return core or payload
+
+
+def analyze_page(body, payload, core, scope):
+    """Process-pool job: static verdict plus response fingerprint for one page."""
+    text = body.decode("utf-8", errors="replace")
+    verdict, reason = analyze_reflection(text, payload, core)
+    fingerprint = reflection_fingerprint(scope, text, reflection_spans(text, core))
+    return verdict, reason, fingerprint
+
+
+class PrescreenStats:
+    def __init__(self):
+        self.total = 0
+        self.likely = 0
+        self.needs_browser = 0
+        self.inert = 0     # Reflected verbatim, but the tokenizer found nothing that can run
+        self.rejected = 0
+        self.unknown = 0  # Fetch failed; passed on to the browser to be safe
+        self.skipped = 0
+        self.duplicates = 0  # Browser loads saved by response fingerprints
+        self.unbatched = 0  # Multi-injection URLs sent back to single injections
+
+    def report(self):
+        passed = self.likely + self.needs_browser + self.unknown
+        percent = 100 * (self.total - passed + self.duplicates) / self.total if self.total else 0
+        return (f"[🔎] Pre-screened {self.total} URLs: {self.likely} likely executable, "
+                f"{self.needs_browser} need a browser, {self.inert} inert, {self.unknown} unknown, "
+                f"{self.rejected} not reflected, {self.skipped} skipped, {self.duplicates} duplicates "
+                f"-> {passed - self.duplicates} to the browser ({percent:.1f}% fewer page loads, "
+                f"{self.duplicates} saved by fingerprints)"
+                + (f", {self.unbatched} batches left for single-injection retests" if self.unbatched else ""))
+
+
+async def prescreen_url(engine, pool, url, param, stats, skip_log, executed, claimed, store):
+    """
+    Returns the fields to tag the URL with, or None if it should not go to
+    the browser. Duplicates come back with duplicate=True.
+    """
+    payload = payload_of(url, param) if param else None
+    if not payload:
+        stats.unknown += 1
+        return {"verdict": "unknown"}
+
+    core = executable_core(payload)
+    try:
+        r = await engine.read(url)
+    except CircuitOpenError:
+        stats.skipped += 1
+        skip_log.record(f"{url} | {param}")
+        return None
+    except Exception as e:
+        print(f"[⚠️] Pre-screen fetch failed, keeping: {url} | {e}")
+        stats.unknown += 1
+        return {"verdict": "unknown"}
+
+    # Cheap verbatim check here; only pages that pass are shipped to the pool
+    if core.lower().encode() not in r.body.lower():
+        stats.rejected += 1
+        return None
+
+    loop = asyncio.get_running_loop()
+    verdict, reason, fingerprint = await loop.run_in_executor(
+        pool, analyze_page, r.body, payload, core, fingerprint_scope(url, param))
+    if verdict == INERT:
+        stats.inert += 1
+        return None
+    if verdict == LIKELY:
+        stats.likely += 1
+    else:
+        stats.needs_browser += 1
+
+    tags = {"verdict": verdict, "fp": fingerprint}
+    if fingerprint in executed or fingerprint in claimed:
+        stats.duplicates += 1
+        tags["duplicate"] = True
+    else:
+        claimed.add(fingerprint)
+        # Only complete, unredirected pages can stand in for the browser's own fetch
+        if store is not None and r.stopped == "eof" and r.url == url:
+            await loop.run_in_executor(None, store.put, url, r.status_code, r.headers, r.body)
+    return tags
+
+
+async def prescreen_batch(engine, pool, url, meta, stats, skip_log, fallback, store):
+    """prescreen_url() for a multi-injection URL: kept when any of its payloads can still run."""
+    try:
+        r = await engine.read(url)
+    except CircuitOpenError:
+        stats.skipped += 1
+        skip_log.record(f"{url} | batch")
+        return None
+    except Exception as e:
+        print(f"[⚠️] Pre-screen fetch failed, unbatching: {url} | {e}")
+        r = None
+    if r is None or r.status_code >= 400:
+        # Several payloads at once may be what the server chokes on
+        stats.unbatched += 1
+        fallback.write(format_validated_line(url, ",".join(entry[0] for entry in batch_entries(meta)), **meta) + "\n")
+        return None
+
+    loop = asyncio.get_running_loop()
+    verdicts = set()
+    for param, *_ in batch_entries(meta):
+        payload = payload_of(url, param)
+        core = executable_core(payload) if payload else None
+        if core and core.lower().encode() in r.body.lower():
+            verdict, _, _ = await loop.run_in_executor(
+                pool, analyze_page, r.body, payload, core, fingerprint_scope(url, param))
+            verdicts.add(verdict)
+    if not verdicts:
+        stats.rejected += 1
+        return None
+    if verdicts == {INERT}:
+        stats.inert += 1
+        return None
+    if LIKELY in verdicts:
+        stats.likely += 1
+    else:
+        stats.needs_browser += 1
+    if store is not None and r.stopped == "eof" and r.url == url:
+        await loop.run_in_executor(None, store.put, url, r.status_code, r.headers, r.body)
+    return {"verdict": LIKELY if LIKELY in verdicts else BROWSER}
+
+
+def read_work_lines(path):
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+async def run_prescreen(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    stats = PrescreenStats()
+    skip_log = SkipLog(SKIPPED_FILE)
+    open(SKIPPED_FILE, "w").close()
+
+    executed = FingerprintStore()
+    claimed = set()
+    store = ResponseStore() if STORE_RESPONSES else None
+
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    pending = set()
+
+    with ProcessPoolExecutor(max_workers=ANALYZER_WORKERS) as pool:
+        async with HttpEngine(max_concurrency=MAX_CONCURRENCY, max_per_host=MAX_PER_HOST,
+                              max_body=MAX_BODY_BYTES) as engine:
+            with open(output_file, "w") as out, open(DUPLICATES_FILE, "w") as duplicates, \
+                    open(BATCH_FALLBACK_FILE, "a") as fallback:
+
+                def write_survivor(task, url, param, meta):
+                    pending.discard(task)
+                    in_flight.release()
+                    if task.cancelled() or task.exception():
+                        # A pre-screen bug must not cost a URL: the browser decides, as after a failed fetch
+                        error = "cancelled" if task.cancelled() else repr(task.exception())
+                        print(f"[⚠️] Pre-screen failed, keeping: {url} | {error}")
+                        stats.unknown += 1
+                        tags = {"verdict": "unknown"}
+                    else:
+                        tags = task.result()
+                    if not tags:
+                        return
+                    target = duplicates if tags.pop("duplicate", False) else out
+                    meta.update(tags)
+                    target.write((format_validated_line(url, param, **meta) if param else url) + "\n")
+                    target.flush()
+
+                for line in read_work_lines(input_file):
+                    url, param, meta = parse_validated_line(line)
+                    stats.total += 1
+                    await in_flight.acquire()
+                    if "batch" in meta:
+                        work = prescreen_batch(engine, pool, url, meta, stats, skip_log, fallback, store)
+                    else:
+                        work = prescreen_url(engine, pool, url, param, stats, skip_log, executed, claimed, store)
+                    task = asyncio.create_task(work)
+                    pending.add(task)
+                    task.add_done_callback(
+                        lambda t, url=url, param=param, meta=meta: write_survivor(t, url, param, meta))
+
+                if pending:
+                    await asyncio.wait(set(pending))
+
+    print(stats.report())
+    if store is not None:
+        print(f"[💾] {len(store)} responses in {store.path}/ ({store.total_bytes // 1024} KiB compressed)")
+
+
+def main():
+    input_file = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    output_file = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_FILE
+    asyncio.run(run_prescreen(input_file, output_file))
+
+
+if __name__ == "__main__":
+    main()
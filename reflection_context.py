@@ -0,0 +1,216 @@
+import re
+
+# === Reflection Contexts ===
+# Base kinds; quoted kinds get a _dq / _sq / _bt / _uq suffix for the quote around the reflection
+HTML_TEXT = "html_text"
+ATTR_VALUE = "attr_value"
+URL_ATTR = "url_attr"
+SCRIPT_STRING = "script_string"
+SCRIPT_BLOCK = "script_block"
+COMMENT = "comment"
+TAG = "tag"  # Inside a tag, between attributes
+
+QUOTE_SUFFIX = {'"': "dq", "'": "sq", "`": "bt", "": "uq"}
+
+URL_ATTRIBUTES = {
+    "href", "src", "action", "formaction", "data", "poster", "background",
+    "codebase", "cite", "xlink:href", "srcdoc", "ping", "lowsrc",
+}
+
+TAG_NAME_RE = re.compile(r"<[^\s>/]*")
+ATTR_NAME_RE = re.compile(r"[^\s=>/]+")
+UNQUOTED_VALUE_RE = re.compile(r"[^\s>]*")
+
+
+def with_quote(kind, quote):
+    return f"{kind}_{QUOTE_SUFFIX[quote]}"
+
+
+def attribute_state(tag_text):
+    """
+    Walks the open tag text that precedes the reflection ("<input type=x value=")
+    and returns (attribute_name, quote) when the reflection sits inside an
+    attribute value, or None when it sits between attributes.
+    """
+    i = TAG_NAME_RE.match(tag_text).end()
+    n = len(tag_text)
+
+    while i < n:
+        if tag_text[i].isspace() or tag_text[i] == "/":
+            i += 1
+            continue
+
+        m = ATTR_NAME_RE.match(tag_text, i)
+        if not m:
+            i += 1
+            continue
+        name = m.group().lower()
+        i = m.end()
+
+        while i < n and tag_text[i].isspace():
+            i += 1
+        if i >= n or tag_text[i] != "=":
+            continue
+        i += 1
+        while i < n and tag_text[i].isspace():
+            i += 1
+        if i >= n:
+            return name, ""
+
+        quote = tag_text[i]
+        if quote in "\"'":
+            end = tag_text.find(quote, i + 1)
+            if end == -1:
+                return name, quote
+            i = end + 1
+        else:
+            i = UNQUOTED_VALUE_RE.match(tag_text, i).end()
+            if i >= n:
+                return name, ""
+
+    return None
+
+
+def open_js_quote(script):
+    """Returns the quote of the JS string literal left open at the end of script, or None."""
+    quote = None
+    i = 0
+    n = len(script)
+    while i < n:
+        c = script[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'`":
+            quote = c
+        elif script.startswith("//", i):
+            newline = script.find("\n", i)
+            if newline == -1:
+                return None
+            i = newline
+        elif script.startswith("/*", i):
+            close = script.find("*/", i + 2)
+            if close == -1:
+                return None
+            i = close + 1
+        i += 1
+    return quote
+
+
+def classify_context(before):
+    """
+    Classifies where a reflection landed from the page text that precedes it.
+    Only a bounded window before the marker is needed, which is what the
+    streamed scan keeps around.
+    """
+    lower = before.lower()
+
+    if lower.rfind("<!--") > lower.rfind("-->"):
+        return COMMENT
+
+    script_open = lower.rfind("<script")
+    if script_open > lower.rfind("</script"):
+        tag_end = before.find(">", script_open)
+        if tag_end != -1:
+            quote = open_js_quote(before[tag_end + 1:])
+            return with_quote(SCRIPT_STRING, quote) if quote else SCRIPT_BLOCK
+
+    tag_open = lower.rfind("<")
+    if tag_open > lower.rfind(">") and TAG_NAME_RE.match(before, tag_open).end() > tag_open + 1:
+        state = attribute_state(before[tag_open:])
+        if state is None:
+            return TAG
+        name, quote = state
+        kind = URL_ATTR if name in URL_ATTRIBUTES else ATTR_VALUE
+        return with_quote(kind, quote)
+
+    return HTML_TEXT
+
+
+# === Payload Tagging ===
+PROBE_CHARS = "<>\"'`()/="  # Characters payloads depend on, probed by the validator
+
+NEW_TAG_RE = re.compile(r"<\s*/?\s*[a-z!]", re.I)
+EVENT_HANDLER_RE = re.compile(r"[\s\"'/]on[a-z]+\s*=", re.I)
+JS_URL_RE = re.compile(r"^\s*(javascript|data|vbscript):", re.I)
+SCRIPT_BREAKOUT_RE = re.compile(r"^[^<]*</\s*script", re.I)  # closes the script before opening anything
+JS_CALL_RE = re.compile(r"(alert|prompt|confirm|print|eval)\s*[(`]", re.I)
+
+
+def payload_contexts(payload):
+    """
+    Tags a payload with the reflection contexts it can plausibly fire from.
+    A payload is relevant to a context when it carries the breakout sequence
+    that context needs (closing quote, tag, comment or script) plus something
+    executable afterwards.
+    """
+    contexts = set()
+    new_tag = bool(NEW_TAG_RE.search(payload))
+    handler = bool(EVENT_HANDLER_RE.search(payload))
+    js_call = bool(JS_CALL_RE.search(payload))
+
+    if new_tag:
+        contexts.add(HTML_TEXT)
+    if handler or (new_tag and ">" in payload):
+        contexts.add(TAG)
+
+    for quote in "\"'":
+        if quote in payload and (handler or new_tag):
+            contexts.add(with_quote(ATTR_VALUE, quote))
+            contexts.add(with_quote(URL_ATTR, quote))
+    if handler or (">" in payload and new_tag):
+        contexts.add(with_quote(ATTR_VALUE, ""))
+        contexts.add(with_quote(URL_ATTR, ""))
+
+    if JS_URL_RE.search(payload):
+        for quote in ("\"", "'", ""):
+            contexts.add(with_quote(URL_ATTR, quote))
+
+    if "-->" in payload or "--!>" in payload:
+        contexts.add(COMMENT)
+
+    if SCRIPT_BREAKOUT_RE.search(payload):
+        contexts.add(SCRIPT_BLOCK)
+        for quote in "\"'`":
+            contexts.add(with_quote(SCRIPT_STRING, quote))
+    if js_call:
+        if "<" not in payload:
+            contexts.add(SCRIPT_BLOCK)
+        for quote in "\"'`":
+            if quote in payload:
+                contexts.add(with_quote(SCRIPT_STRING, quote))
+
+    return contexts
+
+
+def required_chars(payload):
+    """The probed special characters a payload cannot work without."""
+    return {char for char in PROBE_CHARS if char in payload}
+
+
+def chars_available(payload_chars, surviving):
+    """Unknown survival keeps every payload; otherwise every required char must survive."""
+    if surviving is None:
+        return True
+    return payload_chars <= set(surviving)
+
+
+def filtered_chars(surviving):
+    """The probed chars that did not come back; none when survival is unknown."""
+    if surviving is None:
+        return ""
+    return "".join(char for char in PROBE_CHARS if char not in surviving)
+
+
+def surviving_chars(filtered):
+    """Inverse of filtered_chars: unknown survival comes back as every probed char, which filters the same."""
+    return "".join(char for char in PROBE_CHARS if char not in filtered)
+
+
+def payload_fits(payload_tags, context):
+    """Unknown contexts keep every payload; known ones keep only tagged payloads."""
+    if not context:
+        return True
+    return context in payload_tags
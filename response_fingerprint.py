@@ -0,0 +1,59 @@
+import os
+import re
+import hashlib
+import threading
+from urllib.parse import urlparse
+
+# === Response Fingerprints ===
+# Servers that normalize, truncate or strip payloads turn many constructed
+# URLs into the same page. The fingerprint of a URL is a hash of the
+# normalized text around its reflections, scoped to (host, path, param):
+# two URLs with the same fingerprint would show the browser the same thing.
+FINGERPRINT_WINDOW = 256  # Characters kept on each side of a reflection
+EXECUTED_FINGERPRINTS_FILE = "executed_fingerprints.txt"  # Appended by the browser runners
+
+DIGITS_RE = re.compile(r"\d+")
+
+
+def fingerprint_scope(url, param):
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower()}{parsed.path}|{param}"
+
+
+def normalize_region(region):
+    # Case, whitespace and numbers (alert(1) vs alert(2), timestamps, nonces) do not change what runs
+    return DIGITS_RE.sub("0", " ".join(region.lower().split()))
+
+
+def reflection_fingerprint(scope, text, spans):
+    """Hash of the normalized regions around every reflection span."""
+    digest = hashlib.sha1(scope.encode())
+    for start, end in spans:
+        region = text[max(0, start - FINGERPRINT_WINDOW):end + FINGERPRINT_WINDOW]
+        digest.update(b"\0" + normalize_region(region).encode())
+    return digest.hexdigest()[:16]
+
+
+class FingerprintStore:
+    """Thread-safe set of fingerprints already executed in a browser, persisted as one per line."""
+
+    def __init__(self, path=EXECUTED_FINGERPRINTS_FILE):
+        self.path = path
+        self.executed = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.executed = set(line.strip() for line in f if line.strip())
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.executed
+
+    def record(self, fingerprint):
+        if not fingerprint:
+            return
+        with self._lock:
+            if fingerprint in self.executed:
+                return
+            self.executed.add(fingerprint)
+            with open(self.path, "a") as f:
+                f.write(fingerprint + "\n")
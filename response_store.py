@@ -0,0 +1,126 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# === Response Store ===
+# Main documents captured over HTTP by the pre-screen, so the browser stage
+# can serve the top-level navigation locally instead of fetching it again.
+# One zlib-compressed file per URL: a JSON header line, then the body.
+# The response headers are kept (CSP, X-Frame-Options, Set-Cookie, the real
+# charset...) so a served page behaves like the live one: a payload the
+# site's CSP blocks must stay blocked. Headers that describe the transfer
+# rather than the page are dropped, since the body is stored decoded.
+# The directory is kept under max_bytes by evicting the least recently used
+# entries (file mtime, refreshed on every hit).
+RESPONSE_STORE_DIR = "response_store"
+RESPONSE_STORE_MAX_BYTES = 512 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+TRANSFER_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "content-length", "content-encoding",
+}
+
+
+def store_key(url):
+    return hashlib.sha1(url.encode()).hexdigest()
+
+
+def replay_headers(headers):
+    """The (name, value) pairs worth serving again: everything but hop-by-hop and encoding headers."""
+    return [(name, value) for name, value in headers if name.lower() not in TRANSFER_HEADERS]
+
+
+class StoredResponse:
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers  # (name, value) pairs as the server sent them, minus TRANSFER_HEADERS
+        self.body = body
+
+    @property
+    def content_type(self):
+        for name, value in self.headers:
+            if name.lower() == "content-type":
+                return value
+        return None
+
+
+class ResponseStore:
+    """Thread-safe, size-bounded on-disk cache of main-document responses keyed by URL."""
+
+    def __init__(self, path=RESPONSE_STORE_DIR, max_bytes=RESPONSE_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        entries = []
+        for name in os.listdir(path):
+            full = os.path.join(path, name)
+            if name.endswith(".z") and os.path.isfile(full):
+                stat = os.stat(full)
+                entries.append((stat.st_mtime, name[:-2], stat.st_size))
+        entries.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in entries)  # key -> compressed size, LRU first
+        self.total_bytes = sum(self._entries.values())
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".z")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, url, status_code, headers, body):
+        header = json.dumps({"url": url, "status": status_code, "headers": replay_headers(headers)})
+        data = zlib.compress(header.encode() + b"\n" + body, COMPRESSION_LEVEL)
+        if len(data) > self.max_bytes:
+            return
+        key = store_key(url)
+        with self._lock:
+            with open(self._file(key), "wb") as f:
+                f.write(data)
+            self._forget(key)
+            self._entries[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def get(self, url):
+        """Returns a StoredResponse, or None if the URL was never captured or got evicted."""
+        key = store_key(url)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._file(key), "rb") as f:
+                    data = zlib.decompress(f.read())
+                os.utime(self._file(key))
+            except (OSError, zlib.error):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        header, body = data.split(b"\n", 1)
+        meta = json.loads(header)
+        if "headers" not in meta:
+            return None  # Stored before headers were kept: the live page's CSP is unknown
+        return StoredResponse(meta["status"], [tuple(header) for header in meta["headers"]], body)
+
+    def _forget(self, key):
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
@@ -0,0 +1,71 @@
+from cdp_client import call_arguments, log_dialog_calls
+from confirmed_params import ConfirmedParams, SKIPPED_AFTER_CONFIRMATION_FILE
+from multi_injection import BatchLog, BATCH_FALLBACK_FILE
+from payload_classes import ExpansionLog, EXPAND_CLASSES_FILE
+from payload_stats import PayloadStats, PAYLOAD_STATS_FILE
+from response_fingerprint import FingerprintStore
+
+# === Runner Results ===
+# What every browser runner (xss_classic/ and xss_poly/) keeps about the
+# URLs it tests: confirmed params, so a param's remaining payloads are
+# skipped after one fires; payload hit rates for the constructors'
+# best-first order; class representatives to expand; nonce attribution of
+# multi-injection URLs; and the fingerprints of loaded responses for the
+# next pre-screen run.
+
+
+class RunResults:
+    """The trackers of one runner, fed from the constructed "url | param | ..." lines it tests."""
+
+    def __init__(self, lines, stop_after_confirmation=True):
+        self.fingerprints = {url: meta["fp"] for url, _, meta in lines if "fp" in meta}
+        self.executed_fingerprints = FingerprintStore()
+        self.confirmed_params = ConfirmedParams({url: param for url, param, _ in lines if param},
+                                                enabled=stop_after_confirmation)
+        self.payload_stats = PayloadStats()
+        self.expansion_log = ExpansionLog()
+        self.batch_log = BatchLog(self.confirmed_params, self.payload_stats, self.expansion_log)
+        for url, param, meta in lines:
+            self.payload_stats.track(url, meta)
+            self.expansion_log.track(url, param, meta)
+            self.batch_log.track(url, meta)
+        self.ranks = {url: int(meta.get("rank", 0)) for url, _, meta in lines}
+
+    def ranked(self, urls):
+        """Rank by rank: every parameter's historically best payloads run before anyone's long tail."""
+        return sorted(urls, key=lambda url: self.ranks.get(url, 0))
+
+    def already_executed(self, url):
+        """True if a runner already loaded a page rendering the same response."""
+        return self.fingerprints.get(url) in self.executed_fingerprints
+
+    def should_skip(self, url):
+        return self.confirmed_params.should_skip(url)
+
+    def loaded(self, url):
+        self.executed_fingerprints.record(self.fingerprints.get(url))
+
+    def record(self, url, alert_text, calls=()):
+        """A tested URL: alert_text is its first dialog's text (None if none fired), calls its hooked calls."""
+        hit = alert_text is not None
+        if hit:
+            log_dialog_calls(url, calls)
+            self.confirmed_params.confirm(url)
+            self.batch_log.alert(url, alert_text, call_arguments(calls))
+        self.payload_stats.record(url, hit)
+        self.expansion_log.record(url, hit)
+        if not hit:
+            self.batch_log.miss(url)
+
+    def save(self):
+        """Writes what the next runs build on and prints where it went."""
+        if self.confirmed_params.skipped:
+            print(f"🎯 {self.confirmed_params.skipped} URLs of already confirmed parameters skipped, see {SKIPPED_AFTER_CONFIRMATION_FILE}")
+        self.payload_stats.save()
+        print(f"📊 Payload hit rates updated in {PAYLOAD_STATS_FILE}")
+        expanding = self.expansion_log.save(self.confirmed_params)
+        if expanding:
+            print(f"🧬 {expanding} payload classes reflected without firing, expand them from {EXPAND_CLASSES_FILE}")
+        unbatched = self.batch_log.save()
+        if unbatched:
+            print(f"🧩 {unbatched} multi-injection URLs need single-injection retests, see {BATCH_FALLBACK_FILE}")
@@ -0,0 +1,260 @@
+import time
+import threading
+
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from adaptive_concurrency import host_of
+from circuit_breaker import CircuitOpenError
+from cdp_client import DialogWatcher, DocumentInterceptor, DIALOG_SETTLE_SECONDS
+from browser_pool import BrowserPool
+from response_store import RESPONSE_STORE_DIR
+from tab_engine import TabEngine, BrowserLost
+
+# === Selenium Tab Runners ===
+# fixed_xss.py, newxssspro.py and xss_parrell_tab_final1.py drive Chrome
+# through chromedriver and only differ in how they open a URL in a tab.
+# Everything around that lives here: page loads under the host limiter and
+# circuit breaker, DevTools dialog watching and document interception per
+# driver, recording a tested URL, and the concurrent-tabs worker that
+# drives every tab of a pooled Chrome at once (see tab_engine.py).
+FIXED_ALERT_WAIT = 2  # Without DevTools dialog events: how long a loaded page gets before the alert check
+
+
+def print_error(context, e):
+    print(f"⚠️ {context}: {e}")
+
+
+def driver_pool(launch, **settings):
+    """A BrowserPool of chromedriver sessions; settings are BrowserPool's spares/recycling/memory knobs."""
+    return BrowserPool(launch, pid=lambda driver: driver.service.process.pid, quit=lambda driver: driver.quit(),
+                       **settings)
+
+
+class SeleniumRunner:
+    """
+    The shared part of one Selenium runner. log_executed(url) and
+    log_detected(url, alert_text) write the runner's own result files;
+    log_error(context, e) reports DevTools failures the runner lives with.
+    """
+
+    def __init__(self, results, browser_pool, host_limiter, host_breaker, skip_log, log_executed, log_detected,
+                 response_store=None, timeout=30, max_retries=5, event_driven=True, settle=DIALOG_SETTLE_SECONDS,
+                 hook=False, fixed_wait=FIXED_ALERT_WAIT, log_error=print_error):
+        self.results = results
+        self.browser_pool = browser_pool
+        self.host_limiter = host_limiter
+        self.host_breaker = host_breaker
+        self.skip_log = skip_log
+        self.log_executed = log_executed
+        self.log_detected = log_detected
+        self.response_store = response_store
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.event_driven = event_driven
+        self.settle = settle
+        self.hook = hook
+        self.fixed_wait = fixed_wait
+        self.log_error = log_error
+        self.interceptors = {}  # driver session id -> DocumentInterceptor
+        self.dialog_watchers = {}  # driver session id -> DialogWatcher
+        self._lock = threading.Lock()
+
+    @property
+    def served(self):
+        """Page loads fulfilled from the response store."""
+        return sum(interceptor.served for interceptor in self.interceptors.values())
+
+    # --- DevTools ---
+    def intercept_documents(self, driver, handle=None):
+        """Serves the tab's next main document from the response store, if there is one."""
+        if self.response_store is None:
+            return
+        with self._lock:
+            interceptor = self.interceptors.get(driver.session_id)
+            if interceptor is None:
+                interceptor = self.interceptors[driver.session_id] = DocumentInterceptor(driver, self.response_store)
+        try:
+            interceptor.attach(handle)
+        except Exception as e:
+            self.log_error("DevTools interception failed, loading from the network", e)
+
+    def watch_dialogs(self, driver):
+        """Arms the current tab before a navigation; None falls back to the fixed wait."""
+        if not self.event_driven:
+            return None
+        with self._lock:
+            watcher = self.dialog_watchers.get(driver.session_id)
+            if watcher is None:
+                watcher = self.dialog_watchers[driver.session_id] = DialogWatcher(driver, settle=self.settle,
+                                                                                  hook=self.hook)
+        try:
+            watcher.arm()
+            return watcher
+        except Exception as e:
+            self.log_error("DevTools dialog events failed, falling back to a fixed wait", e)
+            return None
+
+    def wait_for_alert(self, driver, watcher):
+        """Text of the dialog the page just opened (accepted already), or None."""
+        if watcher is not None:
+            _, alert_text = watcher.wait(timeout=self.timeout)
+            return alert_text
+        time.sleep(self.fixed_wait)
+        try:
+            alert = driver.switch_to.alert
+            alert_text = alert.text
+            alert.accept()
+            return alert_text
+        except Exception:
+            return None
+
+    # --- Host-limited page loads ---
+    def _host_slot(self, url):
+        host = host_of(url)
+        started = self.host_limiter.acquire(host)
+        if not self.host_breaker.allow(host):
+            self.host_limiter.release(host, started, None)
+            raise CircuitOpenError(host)
+        return host, started
+
+    def load_page(self, driver, url):
+        """
+        driver.get under the host's adaptive limit and circuit breaker; timeouts
+        and load errors shrink the limit, timeouts and network errors trip the circuit.
+        """
+        self.intercept_documents(driver)
+        host, started = self._host_slot(url)
+        ok = False
+        try:
+            driver.get(url)
+            ok = True
+        except TimeoutException:
+            self.host_breaker.record_failure(host)
+            raise
+        except WebDriverException as e:
+            if "net::ERR_" in str(e):
+                self.host_breaker.record_failure(host)
+            else:
+                self.host_breaker.record_success(host)  # Browser-side error, the host itself answered
+            raise
+        else:
+            self.host_breaker.record_success(host)
+        finally:
+            self.host_limiter.release(host, started, ok)
+
+    def navigate_page(self, driver, watcher, handle, url):
+        """
+        load_page for one tab of a concurrent worker: Page.navigate and that
+        tab's own load/dialog events, so the other tabs keep loading meanwhile.
+        Returns the alert text or None.
+        """
+        self.intercept_documents(driver, handle)
+        host, started = self._host_slot(url)
+        loaded = False
+        try:
+            error = watcher.navigate(url, handle)
+            if error:
+                if error.startswith("net::ERR_"):
+                    self.host_breaker.record_failure(host)
+                raise RuntimeError(error)
+            loaded, alert_text = watcher.wait(handle, timeout=self.timeout)
+            if not loaded:
+                self.host_breaker.record_failure(host)
+                raise TimeoutError(f"no load event after {self.timeout}s")
+            self.host_breaker.record_success(host)
+            return alert_text
+        finally:
+            self.host_limiter.release(host, started, loaded)
+
+    # --- Results ---
+    def record_result(self, url, alert_text, calls):
+        if alert_text is not None:
+            print(f"🛑 XSS Detected! Alert: {alert_text} | URL: {url}")
+            if len(calls) > 1:
+                print(f"🔔 {len(calls)} dialog calls recorded on: {url}")
+            self.log_detected(url, alert_text)
+        self.results.record(url, alert_text, calls)
+        self.results.loaded(url)
+        self.log_executed(url)
+
+    # --- Concurrent tabs ---
+    def test_url_in_tab(self, driver, watcher, handle, url, prepare=None):
+        """
+        Tests url in one of a driver's concurrent tabs, with retries.
+        prepare(driver, watcher, handle, url) runs before each attempt's navigation.
+        """
+        if self.results.should_skip(url):
+            return False
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if prepare is not None:
+                    prepare(driver, watcher, handle, url)
+                watcher.arm(handle)
+                alert_text = self.navigate_page(driver, watcher, handle, url)
+                self.record_result(url, alert_text, watcher.calls(handle))
+                return True
+            except CircuitOpenError:
+                print(f"⛔ Host circuit open, skipping: {url}")
+                self.skip_log.record(url)
+                return False
+            except (TimeoutError, RuntimeError) as e:
+                print(f"⚠️ Attempt {attempt} failed for {url}: {e}")
+                time.sleep(1)
+            except Exception as e:
+                self.log_error(f"DevTools connection lost on {url}", e)
+                raise BrowserLost(str(e)) from e  # The tab or Chrome died
+        print(f"❌ Skipping after {self.max_retries} failures: {url}")
+        return False
+
+    def concurrent_worker(self, instance_id, urls_chunk, tabs, prepare=None):
+        """
+        One pooled Chrome with all its tabs loading at once. Returns the URLs
+        left for the runner's one-tab-at-a-time worker if DevTools never worked.
+        """
+        print(f"🚀 Chrome #{instance_id} starting with {len(urls_chunk)} URLs across {tabs} concurrent tabs")
+        pending = urls_chunk
+        driver = self.browser_pool.acquire()
+        while pending:
+            try:
+                handles = driver.window_handles
+            except WebDriverException as e:
+                self.log_error(f"Chrome #{instance_id} died while idle, switching to a warm one", e)
+                driver = self.browser_pool.replace(driver)
+                continue
+            watcher = DialogWatcher(driver, settle=self.settle, hook=self.hook)
+
+            def test(handle, url):
+                self.browser_pool.admit()
+                return self.test_url_in_tab(driver, watcher, handle, url, prepare)
+
+            engine = TabEngine(handles, test, drain_when=lambda: self.browser_pool.page_done(driver))
+            pending = engine.run(pending)
+            watcher.close()
+            if not pending:
+                break
+            if engine.lost and not engine.tested:
+                print(f"⚠️ Concurrent tabs failed on Chrome #{instance_id}, falling back to one tab at a time")
+                self.browser_pool.retire(driver)
+                return pending
+            if engine.lost:
+                print(f"💥 Lost Chrome #{instance_id} after {engine.tested} URLs, switching to a warm one for the {len(pending)} left...")
+                driver = self.browser_pool.replace(driver)
+            else:
+                print(f"♻️ Recycling Chrome #{instance_id} after {engine.drained}, {len(pending)} URLs left")
+                driver = self.browser_pool.recycle(driver)
+
+        self.browser_pool.retire(driver)
+        print(f"✅ Chrome #{instance_id} finished.")
+        return []
+
+    def report(self):
+        """The end-of-run summary: pool, skipped hosts, the trackers' files, the response store."""
+        if self.browser_pool.recycled:
+            print(f"♻️ {self.browser_pool.recycled} browsers recycled for page count or memory")
+        if self.browser_pool.held_seconds:
+            print(f"🧠 Page loads held {self.browser_pool.held_seconds:.0f}s in total under memory pressure")
+        if self.skip_log.count:
+            print(f"⛔ {self.skip_log.count} URLs skipped on dead hosts, re-queue them from {self.skip_log.path}")
+        self.results.save()
+        if self.response_store is not None:
+            print(f"💾 {self.served} page loads served from {RESPONSE_STORE_DIR}/ instead of the network")
@@ -0,0 +1,140 @@
+from html.parser import HTMLParser
+
+from reflection_context import URL_ATTRIBUTES, JS_CALL_RE, JS_URL_RE, open_js_quote
+
+# === Static Verdicts ===
+# Decided from the response alone, without a browser
+INERT = "inert"        # Reflected only as text, inside a comment, attribute value or JS string
+LIKELY = "likely"      # Payload produced something that runs: handler, script, javascript: URL
+BROWSER = "browser"    # Payload changed the markup, but only a browser can tell if it runs
+
+MAX_SPANS = 50  # Reflections of one payload looked at per response
+EXECUTING_TAGS = {"script"}
+MARKUP_ATTRIBUTES = {"style", "srcdoc", "formaction", "xmlns", "is"}
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def reflection_spans(text, core):
+    """(start, end) offsets of every verbatim (case-insensitive) reflection of the payload core."""
+    lower = text.lower()
+    needle = core.lower()
+    spans = []
+    start = lower.find(needle)
+    while start != -1 and len(spans) < MAX_SPANS:
+        spans.append((start, start + len(needle)))
+        start = lower.find(needle, start + 1)
+    return spans
+
+
+class ReflectionTokenizer(HTMLParser):
+    """
+    Tokenizes a response and looks only at the tokens that overlap a
+    reflection of the payload. Everything the browser would have to
+    execute shows up as a start tag, an attribute or script data here.
+    """
+
+    def __init__(self, text, payload, spans):
+        super().__init__(convert_charrefs=True)
+        self.text = text
+        self.spans = spans
+        self.payload = normalize(payload)
+        self.js_calls = {normalize(m.group()) for m in JS_CALL_RE.finditer(payload)}
+        self.verdict = INERT
+        self.reason = "reflected as text"
+        self._line_starts = [0]
+        for i, c in enumerate(text):
+            if c == "\n":
+                self._line_starts.append(i + 1)
+        self._script_depth = 0
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def _overlaps(self, start, end):
+        return any(start < span_end and end > span_start for span_start, span_end in self.spans)
+
+    def _inside(self, start, end):
+        return any(span_start <= start and end <= span_end for span_start, span_end in self.spans)
+
+    def _flag(self, verdict, reason):
+        # LIKELY beats BROWSER beats INERT; the first reason of the winning kind is kept
+        rank = {INERT: 0, BROWSER: 1, LIKELY: 2}
+        if rank[verdict] > rank[self.verdict]:
+            self.verdict = verdict
+            self.reason = reason
+
+    def handle_starttag(self, tag, attrs):
+        raw = self.get_starttag_text() or ""
+        start = self._offset()
+        end = start + len(raw)
+        if tag == "script":
+            self._script_depth += 1
+        if not self._overlaps(start, end):
+            return
+
+        # The whole tag came from the payload: a new element
+        if self._inside(start, end):
+            if tag in EXECUTING_TAGS:
+                self._flag(LIKELY, f"new <{tag}> element")
+            else:
+                self._flag(BROWSER, f"new <{tag}> element")
+
+        # Attributes the payload put on this tag (new or broken out of a value)
+        for name, value in attrs:
+            value = value or ""
+            if normalize(value) not in self.payload:
+                continue
+            # A whole URL attribute value taken from the payload is enough for javascript:
+            if name in URL_ATTRIBUTES and JS_URL_RE.search(value):
+                self._flag(LIKELY, f"javascript: URL in {name}= on <{tag}>")
+            if normalize(name) not in self.payload:
+                continue
+            if name.startswith("on") and value.strip():
+                self._flag(LIKELY, f"{name}= handler on <{tag}>")
+            elif tag == "script" and name == "src":
+                self._flag(LIKELY, "<script src=> from the payload")
+            elif name in MARKUP_ATTRIBUTES:
+                self._flag(BROWSER, f"{name}= on <{tag}>")
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script_depth:
+            self._script_depth -= 1
+
+    def handle_data(self, data):
+        if not self._script_depth or not self.js_calls:
+            return
+        start = self._offset()
+        lower = data.lower()
+        for call in self.js_calls:
+            index = lower.find(call)
+            while index != -1:
+                if self._overlaps(start + index, start + index + len(call)):
+                    quote = open_js_quote(data[:index])
+                    if quote is None:
+                        self._flag(LIKELY, f"{call} outside any string in a script block")
+                    elif quote == "`" and "${" in self.payload:
+                        self._flag(BROWSER, f"{call} in a template literal")
+                index = lower.find(call, index + 1)
+
+
+def analyze_reflection(body, payload, core):
+    """
+    Returns (verdict, reason) for one response. Runs in the analyzer process
+    pool, so it only takes and returns plain picklable values.
+    """
+    text = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+    spans = reflection_spans(text, core)
+    if not spans:
+        return INERT, "payload not reflected verbatim"
+
+    tokenizer = ReflectionTokenizer(text, payload, spans)
+    try:
+        tokenizer.feed(text)
+        tokenizer.close()
+    except Exception as e:
+        return BROWSER, f"tokenizer gave up: {e}"
+    return tokenizer.verdict, tokenizer.reason
@@ -0,0 +1,113 @@
+import os
+import heapq
+import shutil
+import tempfile
+from itertools import islice
+
+# === Streaming Dedup ===
+# Replaces "build a list, write it, sort -u it" for the payload constructors.
+# Lines are written out as they are generated and duplicates dropped on the
+# fly against an in-memory set of 64-bit line hashes. If the set outgrows
+# DEDUP_MEMORY_BUDGET, the writer switches to an external merge sort: lines
+# go to sorted runs on disk, and close() merges the runs with what was
+# already written into one sorted, duplicate-free file.
+DEDUP_MEMORY_BUDGET = 256 * 1024 * 1024
+BYTES_PER_HASH = 64    # One int plus its set slot, roughly
+RUN_LINES = 1_000_000  # Lines per sorted run once spilling
+
+
+class DedupWriter:
+    def __init__(self, path, memory_budget=DEDUP_MEMORY_BUDGET, run_lines=RUN_LINES):
+        self.path = path
+        self.max_hashes = max(1, memory_budget // BYTES_PER_HASH)
+        self.run_lines = run_lines
+        self.total = 0
+        self.unique = 0
+        self.spilled = False
+        self._seen = set()  # hash(line); a 64-bit collision drops a line, far rarer than anything else here
+        self._out = open(path, "w")
+        self._buffer = []
+        self._runs = []
+        self._run_dir = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def duplicates(self):
+        return self.total - self.unique
+
+    def write(self, line):
+        self.total += 1
+        if self.spilled:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.run_lines:
+                self._flush_run()
+            return
+
+        key = hash(line)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self._out.write(line + "\n")
+        self.unique += 1
+
+        if len(self._seen) >= self.max_hashes:
+            self._spill()
+
+    def _spill(self):
+        print(f"[💽] Dedup set hit its memory budget at {self.unique} lines, spilling to an external sort")
+        self.spilled = True
+        self._seen = set()
+        self._out.close()
+        self._run_dir = tempfile.mkdtemp(prefix="dedup_runs_", dir=os.path.dirname(os.path.abspath(self.path)))
+
+    def _flush_run(self):
+        if not self._buffer:
+            return
+        run_path = os.path.join(self._run_dir, f"run_{len(self._runs):05d}.txt")
+        with open(run_path, "w") as f:
+            for line in sorted(set(self._buffer)):
+                f.write(line + "\n")
+        self._runs.append(run_path)
+        self._buffer = []
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._seen = set()
+        if not self.spilled:
+            self._out.close()
+            return
+
+        self._flush_run()
+        # What was written before the spill is unique but unsorted: sort it into runs too
+        with open(self.path) as head:
+            lines = (line.rstrip("\n") for line in head)
+            while True:
+                self._buffer = list(islice(lines, self.run_lines))
+                if not self._buffer:
+                    break
+                self._flush_run()
+
+        merged_path = self.path + ".merging"
+        files = [open(run_path) for run_path in self._runs]
+        try:
+            self.unique = 0
+            previous = None
+            with open(merged_path, "w") as out:
+                for line in heapq.merge(*files):
+                    if line != previous:
+                        out.write(line)
+                        self.unique += 1
+                        previous = line
+        finally:
+            for f in files:
+                f.close()
+        os.replace(merged_path, self.path)
+        shutil.rmtree(self._run_dir, ignore_errors=True)
@@ -0,0 +1,87 @@
+import queue
+import threading
+
+# === Concurrent Tabs ===
+# The threaded runners used to visit their tabs one after another through
+# chromedriver (switch_to.window, a blocking driver.get, a wait), so more
+# tabs only meant more memory. TabEngine gives every tab of a browser its
+# own loop over one shared URL queue. A loop only talks to its own tab's
+# DevTools session (see cdp_client.DialogWatcher.navigate/wait), never to
+# chromedriver, so every tab has a navigation in flight at once and load
+# and dialog events are handled as the sessions' reader threads deliver
+# them. Throughput then grows with the tab count until Chrome runs out of
+# CPU or memory. drain_when() is asked after every URL: once it returns
+# something true, the tabs finish what they are loading and stop, so the
+# browser can be recycled (see browser_pool) without losing a URL.
+
+
+class BrowserLost(Exception):
+    """Raised by a tab test when its tab or the whole browser is gone."""
+
+
+class TabEngine:
+    """Runs test(handle, url) on all tabs concurrently; a tab takes the next URL as soon as it is done."""
+
+    def __init__(self, handles, test, drain_when=None):
+        self.handles = handles
+        self.test = test  # Called from the tab's own thread; raises BrowserLost to stop the engine
+        self.drain_when = drain_when
+        self.tested = 0
+        self.lost = False
+        self.drained = None  # What drain_when() returned when it stopped the engine
+        self._lock = threading.Lock()
+
+    def run(self, urls):
+        """Tests urls across the tabs; returns the ones left undone if the browser was lost or drained (in order)."""
+        work = queue.Queue()
+        for url in urls:
+            work.put(url)
+        stop = threading.Event()
+        unfinished = []
+
+        def tab_loop(handle):
+            while not stop.is_set():
+                try:
+                    url = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self.test(handle, url)
+                except BrowserLost:
+                    stop.set()
+                    with self._lock:
+                        self.lost = True
+                        unfinished.append(url)
+                    return
+                with self._lock:
+                    self.tested += 1
+                if self.drain_when is not None and not stop.is_set():
+                    reason = self.drain_when()
+                    if reason:
+                        self.drained = reason
+                        stop.set()
+
+        threads = [threading.Thread(target=tab_loop, args=(handle,), daemon=True) for handle in self.handles]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        while not work.empty():
+            unfinished.append(work.get_nowait())
+        order = {url: i for i, url in enumerate(urls)}
+        return sorted(unfinished, key=order.get)
+
+
+def chunkify(lst, n):
+    """Split list into n chunks as evenly as possible"""
+    return [lst[i::n] for i in range(n)]
+
+
+def worker_chunks(urls, size, workers, start_index=0):
+    """
+    Chunks of size URLs dealt round-robin to workers, each as (index of its
+    first URL in the input, chunk); urls start at start_index of the input.
+    """
+    chunks = [(start_index + i, urls[i:i + size]) for i in range(0, len(urls), size)]
+    return chunkify(chunks, workers)
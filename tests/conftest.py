@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipeline's shared modules live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
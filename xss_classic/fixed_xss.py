@@ -1,27 +1,56 @@
 import os
+import sys
 import time
+import itertools
 import threading
 import traceback
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import WebDriverException, TimeoutException
 
+# Shared pipeline helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from adaptive_concurrency import ThreadedAdaptiveLimiter
+from circuit_breaker import CircuitBreaker, CircuitOpenError, SkipLog
+from response_store import ResponseStore, RESPONSE_STORE_DIR
+from run_results import RunResults
+from selenium_runner import SeleniumRunner, driver_pool
+from validated_lines import parse_validated_line
+
 # === Config ===
 chrome_instances = 3
 tabs_per_instance = 2
 timeout_seconds = 30
 delay_seconds = 2
 max_retries = 5
+max_loads_per_host = 6  # Ceiling for the adaptive (AIMD) per-host page-load limit
 
 urls_file = "sorted_urls.txt"
 executed_file = "executed_urls.txt"
 detected_file = "detected_xss.txt"
 error_log_file = "errors.log"
+limits_file = "host_limits.json"
+skipped_file = "skipped_urls.txt"  # URLs skipped on hosts with an open circuit, re-queue from here
+serve_from_store = True  # Fulfil main documents from the pre-screen's response store over DevTools
+stop_after_confirmation = True  # Skip a parameter's remaining payloads once one of them fires
+event_driven_dialogs = True  # Detect alerts from DevTools dialog events instead of a fixed wait per URL
+dialog_settle_seconds = 0.5  # How long a loaded page gets to open a dialog before it counts as clean
+hook_dialogs = True  # Record alert/prompt/confirm/print calls in the page instead of opening dialogs
+concurrent_tabs = True  # All tabs of a Chrome load at once over DevTools instead of taking turns (needs event_driven_dialogs)
+warm_spares = 1  # Browsers kept launched and ready, so a restart or recycle costs no launch time
+recycle_after_pages = 500  # Replace a Chrome after this many page loads...
+recycle_rss_mb = 2048  # ...or once its processes hold this much memory
+memory_high_percent = 85  # Hold new page loads while system memory use is above this
 
 executed_lock = threading.Lock()
 detected_lock = threading.Lock()
 log_lock = threading.Lock()
 
+host_limiter = ThreadedAdaptiveLimiter(maximum=max_loads_per_host)
+host_breaker = CircuitBreaker()
+skip_log = SkipLog(skipped_file)
+response_store = ResponseStore() if serve_from_store and os.path.isdir(RESPONSE_STORE_DIR) else None
+
 # === User-Agent Rotation ===
 user_agents = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
@@ -37,10 +66,14 @@ if os.path.exists(executed_file):
 
 # === Load & Filter URLs ===
 with open(urls_file, "r") as f:
-    all_urls = [line.strip() for line in f if line.strip()]
-    urls = [url for url in all_urls if url not in executed_urls]
+    lines = [parse_validated_line(line) for line in f if line.strip()]
+    results = RunResults(lines, stop_after_confirmation=stop_after_confirmation)
+    all_urls = [url for url, _, _ in lines]
+    urls = [url for url in all_urls if url not in executed_urls and not results.already_executed(url)]
+    if len(urls) < len(all_urls):
+        print(f"⏭️ {len(all_urls) - len(urls)} URLs already executed or duplicating an executed response")
 
-urls.sort()
+urls = results.ranked(urls)
 
 # === Chrome Setup ===
 def get_chrome(user_agent):
@@ -53,6 +86,19 @@ def get_chrome(user_agent):
     chrome_options.add_argument(f"user-agent={user_agent}")
     return webdriver.Chrome(options=chrome_options)
 
+# Each launch takes the next user agent
+user_agent_cycle = itertools.cycle(user_agents)
+
+def launch_chrome():
+    """A Chrome with all its tabs open, for the pool to keep warm."""
+    driver = get_chrome(next(user_agent_cycle))
+    for _ in range(tabs_per_instance - 1):
+        driver.switch_to.new_window("tab")
+    return driver
+
+browser_pool = driver_pool(launch_chrome, spares=warm_spares, recycle_pages=recycle_after_pages,
+                           recycle_rss_mb=recycle_rss_mb, memory_high_percent=memory_high_percent)
+
 # === Logging Helpers ===
 def append_executed_url(url):
     with executed_lock:
@@ -71,37 +117,42 @@ def log_error(context, ex):
             f.write(traceback.format_exc())
             f.write("\n")
 
+# === Shared Runner Helpers ===
+runner = SeleniumRunner(results, browser_pool, host_limiter, host_breaker, skip_log,
+                        log_executed=append_executed_url, log_detected=log_detected_alert,
+                        response_store=response_store, timeout=timeout_seconds, max_retries=max_retries,
+                        event_driven=event_driven_dialogs, settle=dialog_settle_seconds, hook=hook_dialogs,
+                        fixed_wait=delay_seconds, log_error=log_error)
+
 # === Test URL with Alert Detection ===
 def test_url_with_retry(driver, url, tab_index, handles):
+    if results.should_skip(url):
+        return False
     for attempt in range(1, max_retries + 1):
         try:
             driver.set_page_load_timeout(timeout_seconds)
-            driver.get(url)
-            time.sleep(delay_seconds)
-
-            try:
-                alert = driver.switch_to.alert
-                alert_text = alert.text
-                print(f"🛑 XSS Detected! Alert: {alert_text} | URL: {url}")
-                alert.accept()
-                log_detected_alert(url, alert_text)
-
-                # Close current tab and reopen
-                driver.close()
-                if driver.window_handles:
-                    driver.switch_to.window(driver.window_handles[0])
-                driver.execute_script("window.open('');")
-                new_handle = driver.window_handles[-1]
-                handles[tab_index] = new_handle
-                driver.switch_to.window(new_handle)
-
-                append_executed_url(url)
-                return True
-            except:
-                pass
-
-            append_executed_url(url)
+            watcher = runner.watch_dialogs(driver)
+            runner.load_page(driver, url)
+            alert_text = runner.wait_for_alert(driver, watcher)
+            runner.record_result(url, alert_text, watcher.calls() if watcher is not None else [])
+
+            if alert_text is not None and watcher is None:
+                try:
+                    # Close current tab and reopen; hooked or DevTools-accepted dialogs leave the tab usable
+                    driver.close()
+                    if driver.window_handles:
+                        driver.switch_to.window(driver.window_handles[0])
+                    driver.execute_script("window.open('');")
+                    new_handle = driver.window_handles[-1]
+                    handles[tab_index] = new_handle
+                    driver.switch_to.window(new_handle)
+                except:
+                    pass
             return True
+        except CircuitOpenError:
+            print(f"⛔ Host circuit open, skipping: {url}")
+            skip_log.record(url)
+            return False
         except (TimeoutException, WebDriverException):
             print(f"⚠️ Attempt {attempt} failed for {url}")
             time.sleep(1)
@@ -113,15 +164,13 @@ def test_url_with_retry(driver, url, tab_index, handles):
 
 # === Worker Thread ===
 def worker(instance_id, urls_chunk):
+    if concurrent_tabs and event_driven_dialogs:
+        urls_chunk = runner.concurrent_worker(instance_id, urls_chunk, tabs_per_instance)
+        if not urls_chunk:
+            return
     print(f"🚀 Chrome #{instance_id} starting with {len(urls_chunk)} URLs")
-    user_agent = user_agents[instance_id % len(user_agents)]
-    driver = get_chrome(user_agent)
-    handles = [driver.current_window_handle]
-
-    # Open other tabs
-    for _ in range(tabs_per_instance - 1):
-        driver.execute_script("window.open('');")
-        handles.append(driver.window_handles[-1])
+    driver = browser_pool.acquire()
+    handles = driver.window_handles
 
     i = 0
     while i < len(urls_chunk):
@@ -135,38 +184,37 @@ def worker(instance_id, urls_chunk):
 
             driver.switch_to.window(handles[tab_index])
         except Exception as e:
-            print(f"💥 Lost tab/window, restarting Chrome for instance #{instance_id}...")
+            print(f"💥 Lost tab/window, switching Chrome #{instance_id} to a warm one...")
             log_error(f"Tab switch or Chrome failure (instance {instance_id})", e)
-            try:
-                driver.quit()
-            except:
-                pass
-            time.sleep(1)
-            driver = get_chrome(user_agent)
-            handles = [driver.current_window_handle]
-            for _ in range(tabs_per_instance - 1):
-                driver.execute_script("window.open('');")
-                handles.append(driver.window_handles[-1])
+            driver = browser_pool.replace(driver)
+            handles = driver.window_handles
             continue
 
+        browser_pool.admit()
         test_url_with_retry(driver, url, tab_index, handles)
         i += 1
 
-    try:
-        driver.quit()
-    except Exception as e:
-        log_error(f"Chrome quit failure for instance #{instance_id}", e)
+        reason = browser_pool.page_done(driver)
+        if reason:
+            print(f"♻️ Recycling Chrome #{instance_id} after {reason}")
+            driver = browser_pool.recycle(driver)
+            handles = driver.window_handles
 
+    browser_pool.retire(driver)
     print(f"✅ Chrome #{instance_id} finished.")
 
 # === Main ===
 def main():
+    host_limiter.start_monitor(limits_file)
     urls_per_instance = [[] for _ in range(chrome_instances)]
 
     for idx, url in enumerate(urls):
         target = idx % chrome_instances
         urls_per_instance[target].append(url)
 
+    # One warm browser per worker plus the spares, launching while the workers start
+    browser_pool.warm(sum(1 for instance_urls in urls_per_instance if instance_urls) + warm_spares)
+
     threads = []
     for instance_id in range(chrome_instances):
         instance_urls = urls_per_instance[instance_id]
@@ -183,7 +231,10 @@ def main():
 
     for thread in threads:
         thread.join()
+    browser_pool.close()
 
+    host_limiter.write_snapshot(limits_file)
+    runner.report()
     print("🎯 All Chrome instances completed.")
 
 if __name__ == "__main__":
@@ -69,7 +69,8 @@ user_agents = [
 
 # === Load URLs ===
 with open(urls_file, "r") as f:
-    all_urls = [line.strip() for line in f if line.strip()]
+    # Constructed lines are "url | param"; the browser only needs the URL
+    all_urls = [line.split(" | ")[0].strip() for line in f if line.strip()]
 
 all_urls.sort()
 
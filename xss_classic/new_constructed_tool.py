@@ -1,35 +1,52 @@
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-
-# Load payloads
-with open("payloads.txt") as f:
-    payloads = [line.strip() for line in f if line.strip()]
-
-# Load validated URLs (from the tool's output)
-with open("validated_urls.txt") as f:
-    validated_lines = [line.strip() for line in f if line.strip()]
-
-constructed_urls = []
-
-for line in validated_lines:
-    # Extract URL and parameter from validated URLs
-    url, param = line.split(" | ")
-
-    parsed = urlparse(url)
-    query = parse_qs(parsed.query)
-
-    if param not in query:
-        continue  # skip if param not found in query
-
-    for payload in payloads:
-        new_query = query.copy()
-        new_query[param] = [payload]  # Replace the specific param with payload
-        encoded_query = urlencode(new_query, doseq=True)
-        new_url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, encoded_query, parsed.fragment))
-        constructed_urls.append(new_url)
-
-# Save to file or print
-with open("constructed_urls.txt", "w") as f:
-    for u in constructed_urls:
-        f.write(u + "\n")
-
-print(f"[+] Generated {len(constructed_urls)} URLs in constructed_urls.txt")
+import os
+import sys
+
+# Shared helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from payload_compiler import load_corpus
+from payload_constructor import PayloadConstructor
+from streaming_dedup import DedupWriter
+
+SKIP_NON_HEADLESS = True  # Drop payloads that need a click/hover or only work outside Chrome
+REPRESENTATIVES_FIRST = True  # One payload per equivalence class; the runners ask for the rest when it is blocked
+BATCH_INJECTION = True  # Payloads for several reflected params of a URL in one page load, told apart by alert nonces
+BATCH_MAX_PARAMS = 4
+
+# python3 new_constructed_tool.py --expand: the remaining members of the
+# classes listed in expand_classes.txt and single-injection retests of the
+# batches in batch_fallback.txt, instead of the first round
+EXPAND = "--expand" in sys.argv[1:]
+
+# Compiled corpus: deduplicated payloads tagged with contexts, chars and trigger type
+corpus = load_corpus("payloads.txt")
+payloads = [entry for entry in corpus if entry.headless or not SKIP_NON_HEADLESS]
+# Payloads URL-encoded once, best-first per reflection context from the runners' hit rates
+constructor = PayloadConstructor(payloads, representatives=REPRESENTATIVES_FIRST,
+                                 batch=BATCH_INJECTION, batch_max_params=BATCH_MAX_PARAMS)
+skipped = constructor.skipped
+
+
+def read_validated_lines(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+# Stream straight to disk, dropping duplicates on the way (no sort -u pass needed)
+with DedupWriter("constructed_urls.txt") as out:
+    if EXPAND:
+        constructed_lines = constructor.second_round()
+    else:
+        constructed_lines = constructor.construct_urls(read_validated_lines("validated_urls.txt"))
+    for constructed in constructed_lines:
+        out.write(constructed)
+
+print(f"[+] {len(payloads)} of {len(corpus)} compiled payloads can fire headless")
+print(f"[+] Generated {out.unique} URLs in constructed_urls.txt ({out.duplicates} duplicates dropped)")
+print(f"[+] Skipped {skipped['context']} payload/param combinations that do not fit the reflection context")
+print(f"[+] Skipped {skipped['chars']} payload/param combinations needing filtered characters")
+if skipped["class"]:
+    print(f"[+] Held back {skipped['class']} payload/param combinations behind their class representative")
+if skipped["batched"]:
+    print(f"[+] Saved {skipped['batched']} page loads by injecting several params per URL")
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import threading
 import random
@@ -7,6 +8,15 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import WebDriverException, TimeoutException
 
+# Shared pipeline helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from adaptive_concurrency import ThreadedAdaptiveLimiter
+from circuit_breaker import CircuitBreaker, CircuitOpenError, SkipLog
+from response_store import ResponseStore, RESPONSE_STORE_DIR
+from run_results import RunResults
+from selenium_runner import SeleniumRunner, driver_pool
+from validated_lines import parse_validated_line
+
 # === USER AGENTS ===
 user_agents = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122.0.0.0 Safari/537.36",
@@ -26,12 +36,31 @@ chrome_instances = 10
 tabs_per_instance = 20
 timeout_seconds = 30
 max_retries = 5
+max_loads_per_host = 6  # Ceiling for the adaptive (AIMD) per-host page-load limit
 
 urls_file = "sorted_urls.txt"
 executed_file = "executed_urls.txt"
 detected_file = "detected_xss.txt"
+limits_file = "host_limits.json"
+skipped_file = "skipped_urls.txt"  # URLs skipped on hosts with an open circuit, re-queue from here
+serve_from_store = True  # Fulfil main documents from the pre-screen's response store over DevTools
+stop_after_confirmation = True  # Skip a parameter's remaining payloads once one of them fires
+event_driven_dialogs = True  # Detect alerts from DevTools dialog events instead of a fixed wait per URL
+dialog_settle_seconds = 0.5  # How long a loaded page gets to open a dialog before it counts as clean
+hook_dialogs = True  # Record alert/prompt/confirm/print calls in the page instead of opening dialogs
+concurrent_tabs = True  # All tabs of a Chrome load at once over DevTools instead of taking turns (needs event_driven_dialogs)
+warm_spares = 1  # Browsers kept launched and ready, so a restart or recycle costs no launch time
+recycle_after_pages = 500  # Replace a Chrome after this many page loads...
+recycle_rss_mb = 2048  # ...or once its processes hold this much memory
+memory_high_percent = 85  # Hold new page loads while system memory use is above this
 
 executed_lock = threading.Lock()
+detected_lock = threading.Lock()
+
+host_limiter = ThreadedAdaptiveLimiter(maximum=max_loads_per_host)
+host_breaker = CircuitBreaker()
+skip_log = SkipLog(skipped_file)
+response_store = ResponseStore() if serve_from_store and os.path.isdir(RESPONSE_STORE_DIR) else None
 
 # === Load Already Executed URLs ===
 executed_urls = set()
@@ -41,10 +70,14 @@ if os.path.exists(executed_file):
 
 # === Load & Filter URLs ===
 with open(urls_file, "r") as f:
-    all_urls = [line.strip() for line in f if line.strip()]
-    urls = [url for url in all_urls if url not in executed_urls]
+    lines = [parse_validated_line(line) for line in f if line.strip()]
+    results = RunResults(lines, stop_after_confirmation=stop_after_confirmation)
+    all_urls = [url for url, _, _ in lines]
+    urls = [url for url in all_urls if url not in executed_urls and not results.already_executed(url)]
+    if len(urls) < len(all_urls):
+        print(f"⏭️ {len(all_urls) - len(urls)} URLs already executed or duplicating an executed response")
 
-urls.sort()
+urls = results.ranked(urls)
 
 # === Chrome Setup ===
 def get_chrome(user_agent=None):
@@ -60,6 +93,20 @@ def get_chrome(user_agent=None):
     driver.service.process  # Ensure the process is tracked
     return driver
 
+def launch_chrome():
+    """A Chrome with a random user agent and all its tabs open, for the pool to keep warm."""
+    driver = get_chrome(user_agent=random.choice(user_agents))
+    for _ in range(tabs_per_instance - 1):
+        try:
+            driver.switch_to.new_window("tab")
+            time.sleep(0.1)  # Delay to avoid overwhelming Chrome
+        except Exception as e:
+            print(f"❗ Tab creation failed: {e}")
+    return driver
+
+browser_pool = driver_pool(launch_chrome, spares=warm_spares, recycle_pages=recycle_after_pages,
+                           recycle_rss_mb=recycle_rss_mb, memory_high_percent=memory_high_percent)
+
 # === Check Chrome is Alive ===
 def is_chrome_alive(driver):
     try:
@@ -73,16 +120,30 @@ def append_executed_url(url):
         with open(executed_file, "a") as f:
             f.write(url + "\n")
 
+def log_detected_alert(url, alert_text):
+    with detected_lock:
+        with open(detected_file, "a") as out:
+            out.write(f"{url} | Alert: {alert_text}\n")
+
+# === Shared Runner Helpers ===
+runner = SeleniumRunner(results, browser_pool, host_limiter, host_breaker, skip_log,
+                        log_executed=append_executed_url, log_detected=log_detected_alert,
+                        response_store=response_store, timeout=timeout_seconds, max_retries=max_retries,
+                        event_driven=event_driven_dialogs, settle=dialog_settle_seconds, hook=hook_dialogs)
+
 # === Test Single URL with Retry ===
 def test_url_with_retry(driver, url):
+    if results.should_skip(url):
+        return False
     for attempt in range(1, max_retries + 1):
         try:
             driver.set_page_load_timeout(timeout_seconds)
 
             # === Visit domain root first (required before setting cookies)
             domain = "/".join(url.split("/")[:3])  # https://example.com
-            driver.get(domain)
-            time.sleep(1)
+            runner.load_page(driver, domain)
+            if not event_driven_dialogs:
+                time.sleep(1)
 
             # === Add spoofed IP as cookie
             fake_ip = generate_fake_ip()
@@ -93,23 +154,18 @@ def test_url_with_retry(driver, url):
                 print(f"❗ Cookie injection failed: {e}")
 
             # === Load the actual test URL
-            driver.get(url)
-            time.sleep(2)
+            watcher = runner.watch_dialogs(driver)
+            runner.load_page(driver, url)
 
             # === Check for alert
-            try:
-                alert = driver.switch_to.alert
-                alert_text = alert.text
-                print(f"🛑 XSS Detected! Alert: {alert_text} | URL: {url}")
-                with open(detected_file, "a") as out:
-                    out.write(f"{url} | Alert: {alert_text}\n")
-                alert.accept()
-            except:
-                pass
-
-            append_executed_url(url)
+            alert_text = runner.wait_for_alert(driver, watcher)
+            runner.record_result(url, alert_text, watcher.calls() if watcher is not None else [])
             return True
 
+        except CircuitOpenError:
+            print(f"⛔ Host circuit open, skipping: {url}")
+            skip_log.record(url)
+            return False
         except (TimeoutException, WebDriverException) as e:
             print(f"⚠️ Attempt {attempt} failed for {url}: {str(e).splitlines()[0]}")
             time.sleep(1)
@@ -117,25 +173,30 @@ def test_url_with_retry(driver, url):
     print(f"❌ Skipping after {max_retries} failures: {url}")
     return False
 
+# === Spoofed-IP Cookie in One of Many Concurrent Tabs ===
+def spoof_ip_in_tab(driver, watcher, handle, url):
+    """Runs before each concurrent-tab test: the domain root first (cookies need the origin loaded), then the cookie."""
+    domain = "/".join(url.split("/")[:3])
+    watcher.arm(handle)
+    runner.navigate_page(driver, watcher, handle, domain)
+
+    # === Add spoofed IP as cookie, over the tab's own DevTools session
+    fake_ip = generate_fake_ip()
+    try:
+        watcher.session(handle).send("Network.setCookie", {"name": "X-Forwarded-For", "value": fake_ip, "url": domain})
+        print(f"🕵️ Spoofed IP: {fake_ip} added to {domain}")
+    except (TimeoutError, RuntimeError) as e:
+        print(f"❗ Cookie injection failed: {e}")
+
 # === Worker: One Chrome with Multiple Tabs, Self-Healing ===
 def worker(instance_id, urls_chunk):
+    if concurrent_tabs and event_driven_dialogs:
+        urls_chunk = runner.concurrent_worker(instance_id, urls_chunk, tabs_per_instance, prepare=spoof_ip_in_tab)
+        if not urls_chunk:
+            return
     print(f"🚀 Chrome #{instance_id} starting with {len(urls_chunk)} URLs")
-    user_agent = random.choice(user_agents)
-    driver = get_chrome(user_agent=user_agent)
-
-    def setup_browser():
-        driver = get_chrome()
-        handles = [driver.current_window_handle]
-        for _ in range(tabs_per_instance - 1):
-            try:
-                driver.execute_script("window.open('');")
-                time.sleep(0.1)  # Delay to avoid overwhelming Chrome
-                handles.append(driver.window_handles[-1])
-            except Exception as e:
-                print(f"❗ Tab creation failed: {e}")
-        return driver, handles
-
-    driver, handles = setup_browser()
+    driver = browser_pool.acquire()
+    handles = driver.window_handles
 
     i = 0
     while i < len(urls_chunk):
@@ -144,54 +205,47 @@ def worker(instance_id, urls_chunk):
 
         # Tab/window validation
         if tab_index >= len(driver.window_handles):
-            print(f"⚠️ Tab #{tab_index} is missing, restarting browser #{instance_id}")
-            try:
-                driver.quit()
-            except:
-                pass
-            time.sleep(1)
-            driver, handles = setup_browser()
+            print(f"⚠️ Tab #{tab_index} is missing, switching browser #{instance_id} to a warm one")
+            driver = browser_pool.replace(driver)
+            handles = driver.window_handles
             continue
 
         if not is_chrome_alive(driver):
-            print(f"💀 Chrome process died for instance #{instance_id}, restarting...")
-            try:
-                driver.quit()
-            except:
-                pass
-            time.sleep(1)
-            driver, handles = setup_browser()
+            print(f"💀 Chrome process died for instance #{instance_id}, switching to a warm one...")
+            driver = browser_pool.replace(driver)
+            handles = driver.window_handles
             continue
 
         try:
             driver.switch_to.window(handles[tab_index])
         except Exception as e:
-            print(f"💥 Tab switch failed: {e}, restarting Chrome for instance #{instance_id}")
-            try:
-                driver.quit()
-            except:
-                pass
-            time.sleep(1)
-            driver, handles = setup_browser()
+            print(f"💥 Tab switch failed: {e}, switching Chrome for instance #{instance_id} to a warm one")
+            driver = browser_pool.replace(driver)
+            handles = driver.window_handles
             continue
 
+        browser_pool.admit()
         test_url_with_retry(driver, url)
         i += 1
 
-    try:
-        driver.quit()
-    except:
-        pass
+        reason = browser_pool.page_done(driver)
+        if reason:
+            print(f"♻️ Recycling Chrome #{instance_id} after {reason}")
+            driver = browser_pool.recycle(driver)
+            handles = driver.window_handles
 
+    browser_pool.retire(driver)
     print(f"✅ Chrome #{instance_id} finished.")
 
 # === Main ===
 def main():
+    host_limiter.start_monitor(limits_file)
     urls_per_instance = [[] for _ in range(chrome_instances)]
 
     for idx, url in enumerate(urls):
         target = idx % chrome_instances
         urls_per_instance[target].append(url)
+    browser_pool.warm(sum(1 for instance_urls in urls_per_instance if instance_urls) + warm_spares)
 
     threads = []
     for instance_id in range(chrome_instances):
@@ -209,7 +263,10 @@ def main():
 
     for thread in threads:
         thread.join()
+    browser_pool.close()
 
+    host_limiter.write_snapshot(limits_file)
+    runner.report()
     print("🎯 All Chrome instances completed.")
 
 if __name__ == "__main__":
@@ -1,40 +1,53 @@
-from urllib.parse import urlparse, parse_qs, urlunparse
-import copy
-
-# Load and group payloads (3 lines per payload, joined into one line)
-with open("polygots.txt") as f:
-    lines = [line.strip() for line in f if line.strip()]
-payloads = ["".join(lines[i:i+3]) for i in range(0, len(lines), 3)]
-
-# Load new input format (URL | param)
-with open("validated_urls.txt") as f:
-    input_lines = [line.strip() for line in f if " | " in line]
-
-constructed_urls = set()
-
-for line in input_lines:
-    url_part, param = [x.strip() for x in line.split(" | ", 1)]
-
-    parsed = urlparse(url_part)
-    query = parse_qs(parsed.query)
-
-    if param not in query:
-        continue
-
-    for payload in payloads:
-        new_query = copy.deepcopy(query)
-        new_query[param] = [payload]
-
-        query_str = "&".join(f"{k}={v[0]}" for k, v in new_query.items())
-        new_url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, query_str, parsed.fragment))
-
-        constructed_urls.add(new_url)
-
-# Save final URLs
-with open("constructed_polygots_urls.txt", "w") as f:
-    for url in sorted(constructed_urls):
-        f.write(url + "\n")
-
-print(f"[+] Injected payloads into provided URLs.")
-print(f"[+] Total unique constructed URLs: {len(constructed_urls)}")
+import os
+import sys
+
+# Shared helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from payload_compiler import load_corpus
+from payload_constructor import PayloadConstructor
+from streaming_dedup import DedupWriter
+
+SKIP_NON_HEADLESS = True  # Drop polyglots that need a click/hover or only work outside Chrome
+REPRESENTATIVES_FIRST = True  # One polyglot per equivalence class; the runner asks for the rest when it is blocked
+BATCH_INJECTION = True  # Polyglots for several reflected params of a URL in one page load, told apart by alert nonces
+BATCH_MAX_PARAMS = 4
+
+# python3 new_constructed_tooll.py --expand: the remaining members of the
+# classes listed in expand_classes.txt and single-injection retests of the
+# batches in batch_fallback.txt, instead of the first round
+EXPAND = "--expand" in sys.argv[1:]
+
+# Compiled corpus (polygots.txt holds 3 lines per payload, joined into one)
+corpus = load_corpus("polygots.txt", group=3)
+payloads = [entry for entry in corpus if entry.headless or not SKIP_NON_HEADLESS]
+# Polyglots go into the query unencoded and are built to run from any reflection context
+constructor = PayloadConstructor(payloads, raw=True, check_context=False, representatives=REPRESENTATIVES_FIRST,
+                                 batch=BATCH_INJECTION, batch_max_params=BATCH_MAX_PARAMS)
+skipped = constructor.skipped
+
+
+def read_validated_lines(path):
+    with open(path) as f:
+        for line in f:
+            # New input format (URL | param)
+            if " | " in line:
+                yield line.strip()
+
+
+# Stream straight to disk, dropping duplicates on the way (no sort -u pass needed)
+with DedupWriter("constructed_polygots_urls.txt") as out:
+    if EXPAND:
+        constructed_lines = constructor.second_round()
+    else:
+        constructed_lines = constructor.construct_urls(read_validated_lines("validated_urls.txt"))
+    for constructed in constructed_lines:
+        out.write(constructed)
+
+print(f"[+] Injected {len(payloads)} of {len(corpus)} compiled polyglots into provided URLs.")
+print(f"[+] Total unique constructed URLs: {out.unique} ({out.duplicates} duplicates dropped)")
+print(f"[+] Skipped {skipped['chars']} polyglot/param combinations needing filtered characters")
+if skipped["class"]:
+    print(f"[+] Held back {skipped['class']} polyglot/param combinations behind their class representative")
+if skipped["batched"]:
+    print(f"[+] Saved {skipped['batched']} page loads by injecting several params per URL")
 print("[+] Output written to constructed_polygots_urls.txt")
@@ -1,13 +1,18 @@
 import os
-import time
-import socket
+import sys
 import random
-from multiprocessing import Process
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.alert import Alert
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException
+import threading
+
+# Shared pipeline helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from adaptive_concurrency import ThreadedAdaptiveLimiter
+from circuit_breaker import CircuitBreaker, SkipLog
+from browser_backend import BACKEND_CDP, launch_browser
+from chunked_runner import ChunkedRunner
+from response_store import ResponseStore, RESPONSE_STORE_DIR
+from run_results import RunResults
+from tab_engine import worker_chunks
+from validated_lines import parse_validated_line
 
 # === CONFIG ===
 chrome_path = "/home/maddy/Documents/project/chromedriver-linux64/chromedriver"
@@ -17,6 +22,26 @@ resume_file = "resume.log"
 tabs_count = 2
 parallel_browsers = 2
 resume_fallback = 30
+max_loads_per_host = 6  # Ceiling for the adaptive (AIMD) per-host page-load limit
+limits_file = "host_limits.json"
+skipped_file = "skipped_urls.txt"  # URLs skipped on hosts with an open circuit, re-queue from here
+serve_from_store = True  # Fulfil main documents from the pre-screen's response store over DevTools
+stop_after_confirmation = True  # Skip a parameter's remaining payloads once one of them fires
+event_driven_dialogs = True  # Selenium backend: tabs load in parallel and report dialogs over DevTools, no fixed waits
+dialog_settle_seconds = 0.5  # How long a loaded page gets to open a dialog before it counts as clean
+hook_dialogs = True  # Record alert/prompt/confirm/print calls in the page instead of opening dialogs
+tab_load_timeout = 30
+browser_backend = BACKEND_CDP  # "cdp": drive Chrome over DevTools directly, "selenium": through chromedriver
+chrome_args = ["--no-sandbox", "--disable-dev-shm-usage"]  # Add "--headless=new" to run headless
+warm_spares = 1  # Browsers kept launched and ready, so a restart or recycle costs no launch time
+recycle_after_pages = 500  # Replace a Chrome after this many page loads...
+recycle_rss_mb = 2048  # ...or once its processes hold this much memory
+memory_high_percent = 85  # Hold new page loads while system memory use is above this
+
+host_limiter = ThreadedAdaptiveLimiter(maximum=max_loads_per_host)
+host_breaker = CircuitBreaker()
+skip_log = SkipLog(skipped_file)
+response_store = ResponseStore() if serve_from_store and os.path.isdir(RESPONSE_STORE_DIR) else None
 
 # === User Agents ===
 USER_AGENTS = [
@@ -30,13 +55,6 @@ USER_AGENTS = [
 
 # === Functions ===
 
-def check_internet():
-    try:
-        socket.create_connection(("1.1.1.1", 53), timeout=2)
-        return True
-    except:
-        return False
-
 def read_resume_index():
     if os.path.exists(resume_file):
         with open(resume_file, "r") as f:
@@ -48,90 +66,48 @@ def write_resume_index(index):
     with open(resume_file, "w") as f:
         f.write(str(index))
 
-def chunkify(lst, n):
-    """Split list into n chunks as evenly as possible"""
-    return [lst[i::n] for i in range(n)]
-
-def xss_worker(name, url_chunks, base_index):
-    chrome_options = Options()
-    # chrome_options.add_argument("--headless")  # Uncomment to run headless
-
+def launch_chrome():
     # Randomize user-agent
     user_agent = random.choice(USER_AGENTS)
-    chrome_options.add_argument(f"user-agent={user_agent}")
-
-    # Additional browser stability options
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    service = Service(chrome_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    for chunk_index, chunk in enumerate(url_chunks):
-        index_offset = base_index + chunk_index * tabs_count
-
-        for i, url in enumerate(chunk):
-            write_resume_index(index_offset + i)
-            if not check_internet():
-                print(f"[{name}] ❌ No internet. Exiting to resume later.")
-                driver.quit()
-                return
-
-            try:
-                if i == 0:
-                    driver.get(url)
-                else:
-                    driver.execute_script(f"window.open('{url}', '_blank');")
-                time.sleep(3)  # Give payloads time to execute
-            except WebDriverException as e:
-                print(f"[{name}] ⚠️ Failed to open {url} | {e.msg}")
-                continue
-
-        tabs = driver.window_handles
-
-        for i in range(len(chunk)):
-            driver.switch_to.window(tabs[i])
-            time.sleep(2)
-            try:
-                alert = Alert(driver)
-                alert_text = alert.text
-                print(f"[{name}] 🛑 XSS detected: {driver.current_url} | Alert Text: {alert_text}")
-                with open(alert_file, "a") as af:
-                    af.write(driver.current_url + "\n")
-                alert.accept()
-            except:
-                print(f"[{name}] ✅ No XSS popup on: {driver.current_url}")
-
-        # Close extra tabs
-        for i in range(len(tabs) - 1, 0, -1):
-            driver.switch_to.window(tabs[i])
-            driver.close()
-        driver.switch_to.window(tabs[0])
-
-    driver.quit()
+    return launch_browser(browser_backend, args=chrome_args, user_agent=user_agent, driver_path=chrome_path,
+                          settle=dialog_settle_seconds, hook=hook_dialogs, event_driven=event_driven_dialogs,
+                          store=response_store)
 
 # === Main ===
 
 def main():
+    host_limiter.start_monitor(limits_file)
     with open(input_file, "r") as f:
-        urls = [url.strip() for url in f if url.strip()]
+        lines = [parse_validated_line(line) for line in f if line.strip()]
+    results = RunResults(lines, stop_after_confirmation=stop_after_confirmation)
+    urls = results.ranked([url for url, _, _ in lines])
+    runner = ChunkedRunner(results, launch_chrome, host_limiter, host_breaker, skip_log, alert_file,
+                           resume=lambda url, index: write_resume_index(index), tabs_count=tabs_count,
+                           tab_load_timeout=tab_load_timeout, response_store=response_store,
+                           spares=warm_spares, recycle_pages=recycle_after_pages,
+                           recycle_rss_mb=recycle_rss_mb, memory_high_percent=memory_high_percent)
 
     start_index = read_resume_index()
     urls = urls[start_index:]
 
-    all_chunks = [urls[i:i + tabs_count] for i in range(0, len(urls), tabs_count)]
+    grouped_chunks = worker_chunks(urls, tabs_count, parallel_browsers, start_index)
 
-    grouped_chunks = chunkify(all_chunks, parallel_browsers)
+    # One warm browser per worker plus the spares, launching while the workers start
+    runner.browser_pool.warm(sum(1 for chunk_group in grouped_chunks if chunk_group) + warm_spares)
 
     processes = []
     for i, chunk_group in enumerate(grouped_chunks):
-        base_index = start_index + i * len(chunk_group) * tabs_count
-        p = Process(target=xss_worker, args=(f"Worker-{i+1}", chunk_group, base_index))
+        p = threading.Thread(target=runner.worker, args=(f"Worker-{i+1}", chunk_group))
         p.start()
         processes.append(p)
 
     for p in processes:
         p.join()
 
+    runner.browser_pool.close()
+    host_limiter.write_snapshot(limits_file)
+    runner.report()
+
+
 if __name__ == "__main__":
     main()